@@ -0,0 +1,130 @@
+# allocations.py
+# =====================================================
+# SET-BASED ALLOCATION WRITES
+# Division (lecture) and practical allocations applied as
+# whole arrays: one INSERT ... ON CONFLICT per table and a
+# single UPDATE ... FROM for the preferences, whatever the
+# number of rows. Duplicates rely on migrations/004.
+# Touched keys are logged for the incremental weekly-load
+# recalculation (weekly_load.py).
+# =====================================================
+
+from psycopg2.extras import execute_values
+
+from weekly_load import log_changes
+
+
+# -------------------------------
+# DIVISION (LECTURE) ALLOCATIONS
+# -------------------------------
+def subject_load_configs(cur, subject_ids):
+    """{subject_id: (year_level, semester, theory, practical)} – first config per subject"""
+    cur.execute("""
+        SELECT DISTINCT ON (subject_id)
+               subject_id, year_level, semester,
+               weekly_theory_load, weekly_practical_load
+        FROM subject_load_config
+        WHERE subject_id = ANY(%s)
+        ORDER BY subject_id
+    """, (list(subject_ids),))
+    return {r[0]: r[1:] for r in cur.fetchall()}
+
+
+def allocate_divisions(cur, allocations):
+    """
+    allocations: [{"teacher_id", "subject_id", "class_id"}]
+    Inserts the new teacher–subject–class rows, their weekly load
+    and points the matching approved preferences at the division.
+    Already allocated rows are skipped.
+
+    Returns the (teacher_id, subject_id, class_id) rows inserted.
+    Raises ValueError if a subject has no subject_load_config.
+    """
+    rows = [
+        (int(a["teacher_id"]), int(a["subject_id"]), int(a["class_id"]))
+        for a in allocations
+    ]
+    if not rows:
+        return []
+
+    configs = subject_load_configs(cur, {r[1] for r in rows})
+    missing = sorted({r[1] for r in rows} - set(configs))
+    if missing:
+        raise ValueError(f"Year / Semester not found for subject(s) {missing}")
+
+    # ---------------------------------------------
+    # 1. Allocations – duplicates skipped by the unique index
+    # ---------------------------------------------
+    inserted = execute_values(cur, """
+        INSERT INTO teacher_subject_allocation
+        (teacher_id, subject_id, class_id)
+        VALUES %s
+        ON CONFLICT DO NOTHING
+        RETURNING teacher_id, subject_id, class_id
+    """, rows, page_size=len(rows), fetch=True)
+
+    if not inserted:
+        return []
+
+    # ---------------------------------------------
+    # 2. Weekly load for the new allocations only
+    # ---------------------------------------------
+    execute_values(cur, """
+        INSERT INTO teacher_weekly_load
+        (teacher_id, subject_id, class_id,
+         weekly_theory_load, weekly_practical_load)
+        VALUES %s
+    """, [
+        (t, s, c, configs[s][2], configs[s][3])
+        for t, s, c in inserted
+    ], page_size=len(inserted))
+
+    # ---------------------------------------------
+    # 3. faculty_subject_preferences → subject + division
+    # ---------------------------------------------
+    execute_values(cur, """
+        UPDATE faculty_subject_preferences p
+        SET subject_id = v.subject_id,
+            class_name = c.class_name
+        FROM (VALUES %s) AS v (teacher_id, subject_id, class_id, year_level, semester)
+        JOIN classes c ON c.class_id = v.class_id
+        JOIN subjects s ON s.subject_id = v.subject_id
+        WHERE p.faculty_id = v.teacher_id
+          AND p.allocated_subject = s.subject_name
+          AND p.year_level = v.year_level
+          AND p.semester = v.semester
+    """, [
+        (t, s, c, configs[s][0], configs[s][1])
+        for t, s, c in inserted
+    ], page_size=len(inserted))
+
+    log_changes(cur, inserted)
+    return [tuple(r) for r in inserted]
+
+
+# -------------------------------
+# PRACTICAL (BATCH) ALLOCATIONS
+# -------------------------------
+def allot_practicals(cur, allocations):
+    """
+    allocations: [{"faculty_id", "subject_id", "class_id", "batch_id"}]
+    Returns the (teacher_id, subject_id, class_id, batch_id) rows
+    inserted; already allotted rows are skipped.
+    """
+    rows = [
+        (int(a["faculty_id"]), int(a["subject_id"]), int(a["class_id"]), int(a["batch_id"]))
+        for a in allocations
+    ]
+    if not rows:
+        return []
+
+    inserted = execute_values(cur, """
+        INSERT INTO teacher_batch_subject_allocation
+        (teacher_id, subject_id, class_id, batch_id)
+        VALUES %s
+        ON CONFLICT DO NOTHING
+        RETURNING teacher_id, subject_id, class_id, batch_id
+    """, rows, page_size=len(rows), fetch=True)
+
+    log_changes(cur, inserted)
+    return [tuple(r) for r in inserted]
@@ -1,28 +1,41 @@
-from flask import Flask, request, jsonify, send_from_directory, render_template_string
-import psycopg2
+from flask import Flask, Response, request, jsonify, send_from_directory
+import json
 import os
 from dotenv import load_dotenv
 from collections import defaultdict
+from db import connection, advisory_lock
 from generator import generate_timetable
+from timetable_writer import (
+    publish_timetable,
+    activate_version,
+    active_version,
+    cached_version,
+    list_versions,
+    ACTIVE_VERSION_SQL,
+)
+import timetable_render
+import timetable_query
+from allocations import allocate_divisions, allot_practicals
+import weekly_load
+from psycopg2.extras import execute_values
+from snapshot import load_solver_input_cached, solver_input_hash
+from pages import render_page, static_page
+import assets
+import responses
+import jobs
+from cache import cached, invalidate_tags, invalidate_churn
+from instrumentation import new_stats, timed, summarize, export_stats
 
 # Load environment variables from .env file
 load_dotenv()
 
 app = Flask(__name__)
 
-# =====================================================
-# DATABASE
-# =====================================================
+# orjson-backed jsonify + gzip / brotli for large responses
+responses.init_app(app)
 
-def get_connection():
-    """Establish Supabase database connection using environment variables"""
-    return psycopg2.connect(
-        host=os.getenv("SUPABASE_DB_HOST"),
-        port=os.getenv("SUPABASE_DB_PORT", "5432"),
-        database=os.getenv("SUPABASE_DB_NAME"),
-        user=os.getenv("SUPABASE_DB_USER"),
-        password=os.getenv("SUPABASE_DB_PASSWORD")
-    )
+# Fingerprint + precompress frontend assets once per process
+assets.build()
 
 # =====================================================
 # STATIC FILES
@@ -44,37 +57,38 @@ def hod_files(path):
 def serve_landing_css():
     return send_from_directory("frontend", "landing.css")
 
+# Fingerprinted copies of the above – pages link to these
+@app.route("/assets/<path:path>")
+def fingerprinted_assets(path):
+    return assets.serve(path)
+
 # =====================================================
 # LANDING & LOGIN
 # =====================================================
 
 @app.route("/")
 def landing_page():
-    return send_from_directory("frontend", "index.html")
+    return static_page("index.html")
 
 @app.route("/login")
 def login_page():
-    return send_from_directory("frontend/auth", "login.html")
+    return static_page("auth/login.html")
 
 @app.route("/public/timetable")
 def public_timetable_view():
-    return send_from_directory("frontend/public", "public_view.html")
+    return static_page("public/public_view.html")
 
 @app.route("/api/login", methods=["POST"])
 def login():
     data = request.json
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT user_id, role
-        FROM users
-        WHERE email=%s AND password=%s AND role=%s
-    """, (data["email"], data["password"], data["role"]))
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT user_id, role
+            FROM users
+            WHERE email=%s AND password=%s AND role=%s
+        """, (data["email"], data["password"], data["role"]))
 
-    user = cur.fetchone()
-    cur.close()
-    conn.close()
+        user = cur.fetchone()
 
     if not user:
         return jsonify({"error": "Invalid credentials"}), 401
@@ -91,59 +105,37 @@ def login():
 # FACULTY UI
 # =====================================================
 
-FACULTY_LAYOUT = open("frontend/faculty/layout.html", encoding='utf-8').read()
+FACULTY_LAYOUT = "faculty/layout.html"
 
 @app.route("/faculty/dashboard")
 def faculty_dashboard():
-    with open("frontend/faculty/faculty_dashboard.html", encoding='utf-8') as f:
-        return render_template_string(
-            FACULTY_LAYOUT,
-            title="Dashboard",
-            content=f.read()
-        )
+    return render_page(FACULTY_LAYOUT, "faculty/faculty_dashboard.html", "Dashboard")
 
 @app.route("/faculty/subject-preferences")
 def faculty_preferences_page():
-    with open("frontend/faculty/subject_preferences.html", encoding='utf-8') as f:
-        return render_template_string(
-            FACULTY_LAYOUT,
-            title="Preferences",
-            content=f.read()
-        )
+    return render_page(FACULTY_LAYOUT, "faculty/subject_preferences.html", "Preferences")
 
 @app.route("/faculty/view-timetable")
 def faculty_view_timetable():
-    with open("frontend/faculty/view_timetable.html", encoding='utf-8') as f:
-        return render_template_string(
-            FACULTY_LAYOUT,
-            title="View Timetable",
-            content=f.read()
-        )
+    return render_page(FACULTY_LAYOUT, "faculty/view_timetable.html", "View Timetable")
 
 # =====================================================
 # HOD UI
 # =====================================================
 
-HOD_LAYOUT = open("frontend/hod/layout.html", encoding='utf-8').read()
+HOD_LAYOUT = "hod/layout.html"
 
 @app.route("/hod/dashboard")
 def hod_dashboard():
-    with open("frontend/hod/hod_dashboard.html", encoding='utf-8') as f:
-        return render_template_string(HOD_LAYOUT, title="Dashboard", content=f.read())
+    return render_page(HOD_LAYOUT, "hod/hod_dashboard.html", "Dashboard")
 
 @app.route("/hod/allot")
 def hod_allot():
-    with open("frontend/hod/allot_subjects.html", encoding='utf-8') as f:
-        return render_template_string(
-            HOD_LAYOUT,
-            title="Allot Subjects",
-            content=f.read()
-        )
+    return render_page(HOD_LAYOUT, "hod/allot_subjects.html", "Allot Subjects")
 
 @app.route("/hod/data-input")
 def hod_data_input():
-    with open("frontend/hod/data_input.html", encoding='utf-8') as f:
-        return render_template_string(HOD_LAYOUT, title="Data Input", content=f.read())
+    return render_page(HOD_LAYOUT, "hod/data_input.html", "Data Input")
 
 # =====================================================
 # SUBJECT LOAD CONFIG (PHASE 2) ✅ FIXED
@@ -154,20 +146,17 @@ def subjects_by_semester():
     year = request.args.get("year")
     semester = request.args.get("semester")
 
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT s.subject_id, s.subject_name, s.is_lab,
-               c.weekly_theory_load, c.weekly_practical_load
-        FROM subject_load_config c
-        JOIN subjects s ON s.subject_id = c.subject_id
-        WHERE c.year_level=%s AND c.semester=%s
-        ORDER BY s.subject_name
-    """, (year, semester))
-
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT s.subject_id, s.subject_name, s.is_lab,
+                   c.weekly_theory_load, c.weekly_practical_load
+            FROM subject_load_config c
+            JOIN subjects s ON s.subject_id = c.subject_id
+            WHERE c.year_level=%s AND c.semester=%s
+            ORDER BY s.subject_name
+        """, (year, semester))
+
+        rows = cur.fetchall()
 
     return jsonify([
         {
@@ -183,57 +172,55 @@ def subjects_by_semester():
 @app.route("/api/hod/add-subject-with-load", methods=["POST"])
 def add_subject_with_load():
     d = request.json
-    conn = get_connection()
-    cur = conn.cursor()
+    with connection() as conn, conn.cursor() as cur:
+        is_lab = d["is_lab"]
 
-    is_lab = d["is_lab"]
+        # 🔒 ENFORCE CORRECT LOAD LOGIC
+        weekly_theory = d["weekly_theory_load"]
+        weekly_practical = d["weekly_practical_load"]
 
-    # 🔒 ENFORCE CORRECT LOAD LOGIC
-    weekly_theory = d["weekly_theory_load"]
-    weekly_practical = d["weekly_practical_load"]
-
-    if is_lab:
-        weekly_theory = 0
-    else:
-        weekly_practical = 0
+        if is_lab:
+            weekly_theory = 0
+        else:
+            weekly_practical = 0
 
-    cur.execute("""
-        INSERT INTO subjects (subject_name, department, is_lab)
-        VALUES (%s, %s, %s)
-        ON CONFLICT (subject_name) DO NOTHING
-        RETURNING subject_id
-    """, (d["subject_name"], "Computer Engg", is_lab))
+        cur.execute("""
+            INSERT INTO subjects (subject_name, department, is_lab)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (subject_name) DO NOTHING
+            RETURNING subject_id
+        """, (d["subject_name"], "Computer Engg", is_lab))
 
-    row = cur.fetchone()
-    if not row:
-        cur.execute(
-            "SELECT subject_id FROM subjects WHERE subject_name=%s",
-            (d["subject_name"],)
-        )
         row = cur.fetchone()
+        if not row:
+            cur.execute(
+                "SELECT subject_id FROM subjects WHERE subject_name=%s",
+                (d["subject_name"],)
+            )
+            row = cur.fetchone()
+
+        subject_id = row[0]
+
+        cur.execute("""
+            INSERT INTO subject_load_config
+            (subject_id, year_level, semester,
+             weekly_theory_load, weekly_practical_load)
+            VALUES (%s,%s,%s,%s,%s)
+            ON CONFLICT (subject_id, year_level, semester)
+            DO UPDATE SET
+              weekly_theory_load = EXCLUDED.weekly_theory_load,
+              weekly_practical_load = EXCLUDED.weekly_practical_load
+        """, (
+            subject_id,
+            d["year_level"],
+            d["semester"],
+            weekly_theory,
+            weekly_practical
+        ))
 
-    subject_id = row[0]
-
-    cur.execute("""
-        INSERT INTO subject_load_config
-        (subject_id, year_level, semester,
-         weekly_theory_load, weekly_practical_load)
-        VALUES (%s,%s,%s,%s,%s)
-        ON CONFLICT (subject_id, year_level, semester)
-        DO UPDATE SET
-          weekly_theory_load = EXCLUDED.weekly_theory_load,
-          weekly_practical_load = EXCLUDED.weekly_practical_load
-    """, (
-        subject_id,
-        d["year_level"],
-        d["semester"],
-        weekly_theory,
-        weekly_practical
-    ))
-
-    conn.commit()
-    cur.close()
-    conn.close()
+        # loads already allocated for this subject are now stale
+        weekly_load.log_subject_changes(cur, subject_id)
+        conn.commit()
 
     return jsonify({"message": "Subject load saved correctly"})
 
@@ -245,24 +232,33 @@ def add_subject_with_load():
 def save_faculty_preferences():
     try:
         data = request.json
-        conn = get_connection()
-        cur = conn.cursor()
-
-        # TEMP FIX: auto-increment faculty_id for testing
-        cur.execute("SELECT COALESCE(MAX(faculty_id), 0) + 1 FROM faculty_subject_preferences")
-        faculty_id = cur.fetchone()[0]
-
-        for year in ["SE", "TE", "BE"]:
-            cur.execute("""
+        rows = [
+            (
+                data["faculty_name"],
+                data["designation"],
+                data[year]["prefs"][0],
+                data[year]["prefs"][1],
+                data[year]["prefs"][2],
+                data["short_name"],                   # ✅ short name
+                int(data[year]["semester"]),
+                data["willing_for_practical"],
+                year
+            )
+            for year in ["SE", "TE", "BE"]
+        ]
+
+        with connection() as conn, conn.cursor() as cur:
+            # One statement: a single sequence id (migrations/005)
+            # shared by the SE / TE / BE rows
+            execute_values(cur, """
+                WITH f AS (SELECT nextval('faculty_id_seq') AS faculty_id)
                 INSERT INTO faculty_subject_preferences (
                     faculty_id,
                     faculty_name,
                     designation,
-                    class_name,
                     pref_1,
                     pref_2,
                     pref_3,
-                    allocated_subject,
                     status,
                     short_name,
                     created_time,
@@ -270,31 +266,18 @@ def save_faculty_preferences():
                     willing_for_practical,
                     year_level
                 )
-                VALUES (
-                    %s, %s, %s, %s,
-                    %s, %s, %s,
-                    %s, %s, %s,
-                    NOW(), %s, %s, %s
+                SELECT
+                    f.faculty_id, v.faculty_name, v.designation,
+                    v.pref_1, v.pref_2, v.pref_3,
+                    'PENDING', v.short_name, NOW(),
+                    v.semester, v.willing_for_practical, v.year_level
+                FROM f, (VALUES %s) AS v (
+                    faculty_name, designation, pref_1, pref_2, pref_3,
+                    short_name, semester, willing_for_practical, year_level
                 )
-            """, (
-                faculty_id,
-                data["faculty_name"],
-                data["designation"],
-                None,                                  # class_name (later)
-                data[year]["prefs"][0],
-                data[year]["prefs"][1],
-                data[year]["prefs"][2],
-                None,                                  # allocated_subject
-                "PENDING",
-                data["short_name"],                   # ✅ short name
-                int(data[year]["semester"]),
-                data["willing_for_practical"],
-                year
-            ))
+            """, rows)
 
-        conn.commit()
-        cur.close()
-        conn.close()
+            conn.commit()
 
         return jsonify({"message": "Preferences submitted successfully"})
 
@@ -313,21 +296,17 @@ def approved_teachers():
     semester = request.args.get("semester")
     subject = request.args.get("subject")
 
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT DISTINCT faculty_id, faculty_name
-        FROM faculty_subject_preferences
-        WHERE status = 'APPROVED'
-          AND year_level = %s
-          AND semester = %s
-          AND allocated_subject = %s
-    """, (year, semester, subject))
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT DISTINCT faculty_id, faculty_name
+            FROM faculty_subject_preferences
+            WHERE status = 'APPROVED'
+              AND year_level = %s
+              AND semester = %s
+              AND allocated_subject = %s
+        """, (year, semester, subject))
 
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+        rows = cur.fetchall()
 
     return jsonify([
         {"teacher_id": r[0], "teacher_name": r[1]}
@@ -345,30 +324,21 @@ def approved_teachers():
 
 @app.route("/hod/allot-practicals")
 def hod_allot_practicals():
-    with open("frontend/hod/allot_practicals.html", encoding='utf-8') as f:
-        return render_template_string(
-            HOD_LAYOUT,
-            title="Allot Practicals",
-            content=f.read()
-        )
+    return render_page(HOD_LAYOUT, "hod/allot_practicals.html", "Allot Practicals")
 
 @app.route("/api/hod/preferences")
 def hod_preferences():
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT id, faculty_id, faculty_name,
-               year_level, semester,
-               pref_1, pref_2, pref_3
-        FROM faculty_subject_preferences
-        WHERE status='PENDING'
-        ORDER BY faculty_name, year_level
-    """)
-
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT id, faculty_id, faculty_name,
+                   year_level, semester,
+                   pref_1, pref_2, pref_3
+            FROM faculty_subject_preferences
+            WHERE status='PENDING'
+            ORDER BY faculty_name, year_level
+        """)
+
+        rows = cur.fetchall()
 
     return jsonify([
         {
@@ -384,78 +354,99 @@ def hod_preferences():
 
 @app.route("/api/hod/approve-preferences", methods=["POST"])
 def approve_preferences():
-    data = request.json
-    conn = get_connection()
-    cur = conn.cursor()
+    data = request.json or {}
 
+    # the HOD page sends preference_id from a data- attribute (a string)
     try:
-        for a in data["approvals"]:
-            preference_id = a["preference_id"]
-            allocated_subject = a["allocated_subject"]
-
-            # ---------------------------------------------
-            # 1. Approve preference
-            # ---------------------------------------------
-            cur.execute("""
-                UPDATE faculty_subject_preferences
-                SET allocated_subject = %s,
-                    status = 'APPROVED'
-                WHERE id = %s
-                  AND status = 'PENDING'
-                RETURNING faculty_id, faculty_name
-            """, (allocated_subject, preference_id))
+        approvals = [
+            (int(a["preference_id"]), a["allocated_subject"])
+            for a in data["approvals"]
+        ]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "approvals need a numeric preference_id and allocated_subject"}), 400
 
-            row = cur.fetchone()
-            if not row:
-                continue
-
-            faculty_id, faculty_name = row
+    try:
+        if not approvals:
+            return jsonify({"message": "Preferences approved and teachers synced"})
 
+        with connection() as conn, conn.cursor() as cur:
             # ---------------------------------------------
-            # 2. AUTO INSERT INTO TEACHERS TABLE ✅
+            # Approve every pending preference and AUTO INSERT
+            # the approved faculty INTO TEACHERS ✅ – one statement.
+            # Also reports whether an approval re-pointed a
+            # preference the active timetable displays (short_name
+            # is joined on faculty + year + allocated_subject).
             # ---------------------------------------------
-            cur.execute("""
-                INSERT INTO teachers
-                (teacher_id, teacher_name, department,
-                 max_lectures_per_day, max_practicals_per_day, max_lectures_per_week)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                ON CONFLICT (teacher_id) DO NOTHING
-            """, (
-                faculty_id,
-                faculty_name,
-                "Computer Engg",
-                4,   # default max lectures/day
-                8,   # default max practicals/day
-                15   # default max lectures/week
-            ))
+            (views_changed,), = execute_values(cur, f"""
+                WITH approved AS (
+                    UPDATE faculty_subject_preferences p
+                    SET allocated_subject = v.allocated_subject,
+                        status = 'APPROVED'
+                    FROM (VALUES %s) AS v (preference_id, allocated_subject),
+                         faculty_subject_preferences old
+                    WHERE p.id = v.preference_id
+                      AND old.id = p.id
+                      AND p.status = 'PENDING'
+                    RETURNING p.faculty_id, p.faculty_name, p.year_level,
+                              old.allocated_subject AS old_subject,
+                              p.allocated_subject
+                ),
+                inserted AS (
+                    INSERT INTO teachers
+                    (teacher_id, teacher_name, department,
+                     max_lectures_per_day, max_practicals_per_day, max_lectures_per_week)
+                    SELECT DISTINCT ON (faculty_id)
+                        faculty_id,
+                        faculty_name,
+                        'Computer Engg',
+                        4,   -- default max lectures/day
+                        8,   -- default max practicals/day
+                        15   -- default max lectures/week
+                    FROM approved
+                    ORDER BY faculty_id
+                    ON CONFLICT (teacher_id) DO NOTHING
+                    RETURNING 1
+                )
+                SELECT EXISTS (
+                    SELECT 1
+                    FROM approved a
+                    JOIN timetable t
+                      ON t.teacher_id = a.faculty_id
+                     AND t.timetable_version = {ACTIVE_VERSION_SQL}
+                    JOIN classes c
+                      ON c.class_id = t.class_id
+                     AND LEFT(c.class_name, 2) = a.year_level
+                    JOIN subjects s
+                      ON s.subject_id = t.subject_id
+                     AND s.subject_name IN (a.old_subject, a.allocated_subject)
+                    WHERE a.old_subject IS DISTINCT FROM a.allocated_subject
+                )
+            """, approvals, page_size=len(approvals), fetch=True)
 
-        conn.commit()
-        cur.close()
-        conn.close()
+            # only re-render when a displayed short name moved
+            if views_changed:
+                timetable_render.render_active(cur)
+            conn.commit()
+
+        if views_changed:
+            invalidate_tags(["timetable"])
 
         return jsonify({"message": "Preferences approved and teachers synced"})
 
     except Exception as e:
-        conn.rollback()
-        cur.close()
-        conn.close()
         print("APPROVE ERROR:", e)
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/hod/delete-preference/<int:pref_id>", methods=["DELETE"])
 def delete_preference(pref_id):
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        DELETE FROM faculty_subject_preferences
-        WHERE id = %s
-    """, (pref_id,))
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            DELETE FROM faculty_subject_preferences
+            WHERE id = %s
+        """, (pref_id,))
 
-    conn.commit()
-    cur.close()
-    conn.close()
+        conn.commit()
 
     return jsonify({"message": "Preference deleted"})
 
@@ -468,21 +459,17 @@ def get_allocated_teacher():
     subject_id = request.args.get("subject_id")
     class_id = request.args.get("class_id")
 
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT t.teacher_id, t.teacher_name
-        FROM teacher_subject_allocation tsa
-        JOIN teachers t ON t.teacher_id = tsa.teacher_id
-        WHERE tsa.subject_id = %s
-          AND tsa.class_id = %s
-        LIMIT 1
-    """, (subject_id, class_id))
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT t.teacher_id, t.teacher_name
+            FROM teacher_subject_allocation tsa
+            JOIN teachers t ON t.teacher_id = tsa.teacher_id
+            WHERE tsa.subject_id = %s
+              AND tsa.class_id = %s
+            LIMIT 1
+        """, (subject_id, class_id))
 
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
+        row = cur.fetchone()
 
     if not row:
         return jsonify({})
@@ -503,21 +490,17 @@ def subjects_for_allocation():
     year = request.args.get("year")
     semester = request.args.get("semester")
 
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT s.subject_id, s.subject_name
-        FROM subject_load_config c
-        JOIN subjects s ON s.subject_id = c.subject_id
-        WHERE c.year_level = %s
-          AND c.semester = %s
-        ORDER BY s.subject_name
-    """, (year, semester))
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT s.subject_id, s.subject_name
+            FROM subject_load_config c
+            JOIN subjects s ON s.subject_id = c.subject_id
+            WHERE c.year_level = %s
+              AND c.semester = %s
+            ORDER BY s.subject_name
+        """, (year, semester))
 
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+        rows = cur.fetchall()
 
     return jsonify([
         {"subject_id": r[0], "subject_name": r[1]}
@@ -528,115 +511,41 @@ def subjects_for_allocation():
 @app.route("/api/hod/division-allocation", methods=["POST"])
 def save_division_allocation():
     try:
-        d = request.json
-        conn = get_connection()
-        cur = conn.cursor()
-
-        teacher_id = d["teacher_id"]
-        subject_id = d["subject_id"]
-        class_id = d["class_id"]
-
-        # --------------------------------------------------
-        # 1. Get year & semester for the subject
-        # --------------------------------------------------
-        cur.execute("""
-            SELECT year_level, semester
-            FROM subject_load_config
-            WHERE subject_id = %s
-            LIMIT 1
-        """, (subject_id,))
-
-        row = cur.fetchone()
-        if not row:
-            raise Exception("Year / Semester not found for subject")
+        with connection() as conn, conn.cursor() as cur:
+            inserted = allocate_divisions(cur, [request.json])
+            conn.commit()
 
-        year, semester = row
-
-        # --------------------------------------------------
-        # 2. Prevent duplicate allocation
-        # --------------------------------------------------
-        cur.execute("""
-            SELECT 1
-            FROM teacher_subject_allocation
-            WHERE teacher_id = %s
-              AND subject_id = %s
-              AND class_id = %s
-        """, (teacher_id, subject_id, class_id))
-
-        if cur.fetchone():
+        if not inserted:
             return jsonify({"message": "Already allocated"}), 200
+        return jsonify({"message": "Division allocated successfully"})
 
-        # --------------------------------------------------
-        # 3. Insert FINAL teacher–subject–class allocation
-        # --------------------------------------------------
-        cur.execute("""
-            INSERT INTO teacher_subject_allocation
-            (teacher_id, subject_id, class_id)
-            VALUES (%s, %s, %s)
-        """, (teacher_id, subject_id, class_id))
-
-        # --------------------------------------------------
-        # 4. Insert weekly load
-        # --------------------------------------------------
-        cur.execute("""
-            SELECT weekly_theory_load, weekly_practical_load
-            FROM subject_load_config
-            WHERE subject_id = %s
-              AND year_level = %s
-              AND semester = %s
-        """, (subject_id, year, semester))
-
-        theory, practical = cur.fetchone()
-
-        cur.execute("""
-            INSERT INTO teacher_weekly_load
-            (teacher_id, subject_id, class_id,
-             weekly_theory_load, weekly_practical_load)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (teacher_id, subject_id, class_id, theory, practical))
+    except Exception as e:
+        print("DIVISION ALLOCATION ERROR:", e)
+        return jsonify({"error": str(e)}), 500
 
-        # --------------------------------------------------
-        # 5. ✅ UPDATE faculty_subject_preferences (IMPORTANT)
-        # --------------------------------------------------
-        cur.execute("""
-            UPDATE faculty_subject_preferences
-            SET
-                subject_id = %s,
-                class_name = (
-                    SELECT class_name
-                    FROM classes
-                    WHERE class_id = %s
-                )
-            WHERE faculty_id = %s
-              AND allocated_subject = (
-                  SELECT subject_name
-                  FROM subjects
-                  WHERE subject_id = %s
-              )
-              AND year_level = %s
-              AND semester = %s
-        """, (
-            subject_id,
-            class_id,
-            teacher_id,
-            subject_id,
-            year,
-            semester
-        ))
 
-        conn.commit()
-        cur.close()
-        conn.close()
+@app.route("/api/hod/division-allocation/bulk", methods=["POST"])
+def save_division_allocations_bulk():
+    """{"allocations": [{teacher_id, subject_id, class_id}, ...]} in one transaction"""
+    allocations = (request.json or {}).get("allocations") or []
 
-        return jsonify({"message": "Division allocated successfully"})
+    try:
+        with connection() as conn, conn.cursor() as cur:
+            inserted = allocate_divisions(cur, allocations)
+            conn.commit()
 
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        conn.rollback()
-        cur.close()
-        conn.close()
-        print("DIVISION ALLOCATION ERROR:", e)
+        print("BULK DIVISION ALLOCATION ERROR:", e)
         return jsonify({"error": str(e)}), 500
 
+    return jsonify({
+        "message": "Divisions allocated successfully",
+        "inserted": len(inserted),
+        "skipped": len(allocations) - len(inserted)
+    })
+
 
 
 @app.route("/api/hod/lab-subjects")
@@ -644,22 +553,18 @@ def hod_lab_subjects():
     year = request.args.get("year")
     semester = request.args.get("semester")
 
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT s.subject_id, s.subject_name
-        FROM subject_load_config c
-        JOIN subjects s ON s.subject_id = c.subject_id
-        WHERE s.is_lab = true
-          AND c.year_level = %s
-          AND c.semester = %s
-        ORDER BY s.subject_name
-    """, (year, semester))
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT s.subject_id, s.subject_name
+            FROM subject_load_config c
+            JOIN subjects s ON s.subject_id = c.subject_id
+            WHERE s.is_lab = true
+              AND c.year_level = %s
+              AND c.semester = %s
+            ORDER BY s.subject_name
+        """, (year, semester))
 
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+        rows = cur.fetchall()
 
     return jsonify([
         {
@@ -673,17 +578,14 @@ def hod_lab_subjects():
 
 @app.route("/api/hod/willing-practical-faculty")
 def hod_willing_practical_faculty():
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT DISTINCT faculty_id, faculty_name, short_name
-        FROM faculty_subject_preferences
-        WHERE willing_for_practical = true
-          AND status = 'APPROVED'
-    """)
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT DISTINCT faculty_id, faculty_name, short_name
+            FROM faculty_subject_preferences
+            WHERE willing_for_practical = true
+              AND status = 'APPROVED'
+        """)
+        rows = cur.fetchall()
 
     return jsonify([
         {
@@ -699,168 +601,327 @@ def hod_willing_practical_faculty():
 # GENERATE TIMETABLE ✅ FIXED
 # =====================================================
 
-@app.route("/api/hod/generate-timetable", methods=["POST"])
-def api_generate_timetable():
-    LOGICAL_SLOT_TIME = {
-        1: ("08:30", "09:30"),
-        2: ("09:30", "10:30"),
-        3: ("10:45", "11:45"),
-        4: ("11:45", "12:45"),
-        5: ("13:30", "14:30"),
-        6: ("14:30", "15:30"),
+ACTIVE_CLASSES = (
+    "SE-A", "SE-B", "SE-C",
+    "TE-A", "TE-B",
+    "BE-A", "BE-B"
+)
+
+# pg advisory lock key – one generation at a time across all workers
+GENERATION_LOCK_KEY = 7_401_001
+
+
+def run_generation(report, generations=0, force=False):
+    """
+    Background job body. Generations are serialised across
+    processes by an advisory lock. A run that had to wait still
+    generates for its own input and options; if the run it waited
+    for produced the same input hash, the result cache reuses it.
+    """
+    with advisory_lock(GENERATION_LOCK_KEY, on_wait=lambda: report(phase="waiting")):
+        return generate_and_publish(report, generations, force)
+
+
+def reuse_cached_version(input_hash, stats):
+    """
+    Job result for a version already generated from this input
+    (re-activated if another one is live), or None on a miss.
+    """
+    with connection() as conn, conn.cursor() as cur:
+        hit = cached_version(cur, input_hash)
+        if hit is None:
+            return None
+
+        version_id, entries = hit
+        reactivated = version_id != active_version(cur)
+        if reactivated:
+            timetable_render.render_version(cur, version_id)
+            activate_version(cur, version_id)
+            conn.commit()
+
+    if reactivated:
+        invalidate_tags(["timetable"])
+
+    print(f"📦 Solver input unchanged – reusing timetable version {version_id}")
+    return {
+        "message": "Timetable unchanged since last generation (cached)",
+        "total_entries": entries,
+        "version_id": version_id,
+        "cached": True,
+        "stats": stats
     }
-    
-    try:
-        conn = get_connection()
-        cur = conn.cursor()
 
-        # =====================================================
-        # 1. FETCH ACTIVE CLASSES
-        # =====================================================
-        cur.execute("""
-            SELECT class_id, class_name
-            FROM classes
-            WHERE class_name IN (
-                'SE-A','SE-B','SE-C',
-                'TE-A','TE-B',
-                'BE-A','BE-B'
-            )
-            ORDER BY class_name
-        """)
-        class_rows = cur.fetchall()
-        class_map = {c[0]: c[1] for c in class_rows}
 
+def generate_and_publish(report, generations=0, force=False):
+    """
+    Load → generate → (optional GA) → validate → save.
+    `report(phase=..., **progress)` feeds the job status and
+    stream endpoints. Unless `force`, a solver input already
+    generated before reuses that version (cached: true).
+    """
+    stats = new_stats()
+
+    try:
         # =====================================================
-        # 2. FETCH TEACHERS
+        # 1. LOAD SOLVER INPUT (SNAPSHOT WHEN DB UNCHANGED)
+        # Connections go back to the pool while the solver runs
         # =====================================================
-        cur.execute("""
-            SELECT teacher_id, teacher_name, max_lectures_per_day
-            FROM teachers
-        """)
-        teachers = cur.fetchall()
-
-        teacher_limits = {
-            t[0]: t[2]   # teacher_id → max_lectures_per_day
-            for t in teachers
-        }
+        report(phase="load")
+        with connection() as conn, conn.cursor() as cur:
+            with timed(stats, "load"):
+                data = load_solver_input_cached(cur)
+
+        # Only classes with configured slot rules are generated
+        data = dict(data, class_map={
+            c: name
+            for c, name in data["class_map"].items()
+            if name in ACTIVE_CLASSES
+        })
 
         # =====================================================
-        # 3. FETCH WEEKLY LOAD (SOURCE OF TRUTH)
+        # 1b. RESULT CACHE – same input, same timetable
         # =====================================================
-        cur.execute("""
-            SELECT
-                teacher_id,
-                subject_id,
-                class_id,
-                weekly_theory_load,
-                weekly_practical_load
-            FROM teacher_weekly_load
-        """)
-        weekly_loads = cur.fetchall()
+        input_hash = solver_input_hash(data, generations=generations)
+        if not force:
+            cached_result = reuse_cached_version(input_hash, stats)
+            if cached_result is not None:
+                return cached_result
+
+        teacher_limits = data["teacher_limits"]
+        allocation_set = data["allocation_set"]
+        batch_allocation_set = data["batch_allocation_set"]
 
         weekly_load_map = {
             (t, s, c): {
                 "weekly_theory_load": th,
                 "weekly_practical_load": pr
             }
-            for t, s, c, th, pr in weekly_loads
-        }
-
-        # =====================================================
-        # 4. THEORY ALLOCATIONS
-        # =====================================================
-        cur.execute("""
-            SELECT teacher_id, subject_id, class_id
-            FROM teacher_subject_allocation
-        """)
-        allocation_set = set(cur.fetchall())
-
-        # =====================================================
-        # 5. PRACTICAL (BATCH) ALLOCATIONS
-        # =====================================================
-        cur.execute("""
-            SELECT teacher_id, subject_id, class_id, batch_id
-            FROM teacher_batch_subject_allocation
-        """)
-        batch_allocations = cur.fetchall()
-        batch_allocation_set = set(batch_allocations)
-
-        # =====================================================
-        # 6. PREPARE GENERATOR INPUT
-        # =====================================================
-        data = {
-            "teachers": teachers,
-            "weekly_loads": weekly_loads,
-            "batch_allocations": batch_allocations,
-            "class_map": class_map,
-            "teacher_limits": teacher_limits,
-            "allocation_set": allocation_set,
-            "batch_allocation_set": batch_allocation_set
+            for t, s, c, th, pr in data["weekly_loads"]
         }
 
         # =====================================================
-        # 7. GENERATE TIMETABLE ✅ Using the imported function
+        # 2. GENERATE TIMETABLE ✅ Using the imported function
         # =====================================================
-        final_timetable = generate_timetable(data)
+        final_timetable = generate_timetable(data, stats, progress=report)
+        candidates = [final_timetable]
+
+        # Optional GA refinement – only kept if it still validates
+        optimized = False
+        if generations:
+            import ga_optimizer
+
+            with timed(stats, "optimize"):
+                candidates.insert(0, ga_optimizer.optimize(
+                    data,
+                    generations,
+                    base=final_timetable,
+                    progress=report
+                ))
 
         # =====================================================
-        # 8. VALIDATE (OPTIONAL - already done in generator)
+        # 3. VALIDATE (OPTIONAL - already done in generator)
         # =====================================================
         from constraints import validate_timetable
-        
-        if not validate_timetable(
-            final_timetable,
-            weekly_load_map,
-            teacher_limits,
-            allocation_set,
-            batch_allocation_set
-        ):
+
+        report(phase="validation")
+        with timed(stats, "validation"):
+            for candidate in candidates:
+                is_valid = validate_timetable(
+                    candidate,
+                    weekly_load_map,
+                    teacher_limits,
+                    allocation_set,
+                    batch_allocation_set
+                )
+                if is_valid:
+                    optimized = candidate is not final_timetable
+                    final_timetable = candidate
+                    break
+        if not is_valid:
             raise Exception("Constraint validation failed")
 
         # =====================================================
-        # 9. SAVE TO DATABASE
+        # 4. SAVE TO DATABASE
         # =====================================================
-        cur.execute("TRUNCATE timetable")
+        report(phase="save")
+        with timed(stats, "save"), connection() as conn, conn.cursor() as cur:
+            version_id, churn = publish_timetable(cur, final_timetable, input_hash=input_hash)
+            conn.commit()
+        invalidate_churn(churn)
 
-        cur.executemany("""
-            INSERT INTO timetable
-            (class_id, subject_id, teacher_id, batch_id, is_lab, day, start_time, end_time)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, [
-            (
-                e["class_id"],
-                e["subject_id"],
-                e["teacher_id"],
-                e.get("batch_id"),
-                e["is_lab"],
-                e["day"],
-                LOGICAL_SLOT_TIME[e["slot_id"]][0],
-                LOGICAL_SLOT_TIME[e["slot_id"]][1]
-            )
-            for e in final_timetable
-        ])
+        print(summarize(stats))
+        export_stats(stats)
 
-        conn.commit()
-        cur.close()
-        conn.close()
-
-        return jsonify({
+        return {
             "message": "Timetable generated successfully",
-            "total_entries": len(final_timetable)
-        })
+            "total_entries": len(final_timetable),
+            "version_id": version_id,
+            "churn": churn,
+            "optimized": optimized,
+            "cached": False,
+            "stats": stats
+        }
 
     except Exception as e:
-        try:
-            conn.rollback()
-            cur.close()
-            conn.close()
-        except:
-            pass
-
         print("TIMETABLE GENERATION ERROR:", e)
         import traceback
         traceback.print_exc()
-        return jsonify({"error": str(e)}), 500
+        print(summarize(stats))
+        export_stats(dict(stats, error=str(e)))
+        raise jobs.JobFailed(str(e), {"stats": stats}) from e
+
+
+def submit_generation():
+    """
+    Queues run_generation; body may set {"generations": N} for GA
+    refinement and {"force": true} to bypass the result cache.
+    An identical request while one is queued or running attaches
+    to it → (job_id, attached).
+    """
+    body = request.get_json(silent=True) or {}
+    generations = int(body.get("generations") or 0)
+    force = bool(body.get("force"))
+    return jobs.submit_once(
+        ("generate-timetable", generations, force),
+        "generate-timetable",
+        run_generation,
+        generations=generations,
+        force=force
+    )
+
+
+@app.route("/api/hod/generate-timetable", methods=["POST"])
+def api_generate_timetable():
+    """Queues a generation run (or joins the running one); poll the returned status_url"""
+    job_id, attached = submit_generation()
+    return jsonify({
+        "job_id": job_id,
+        "status": jobs.get_job(job_id)["status"] if attached else "queued",
+        "attached": attached,
+        "status_url": f"/api/hod/generate-timetable/{job_id}",
+        "stream_url": f"/api/hod/generate-timetable/stream?job_id={job_id}"
+    }), 202
+
+
+@app.route("/api/hod/generate-timetable/<job_id>")
+def generate_timetable_status(job_id):
+    job = jobs.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job)
+
+
+# Comment line sent when nothing changed, so proxies keep the stream open
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def sse_event(event, data, event_id=None):
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def progress_payload(job):
+    p = job["progress"]
+    return {
+        "status": job["status"],
+        "phase": job["phase"],
+        "classes_done": p.get("classes_done"),
+        "classes_total": p.get("classes_total"),
+        "entries": p.get("entries"),
+        "generation": p.get("generation"),
+        "generations": p.get("generations"),
+        "best_fitness": p.get("best_fitness"),
+        "elapsed_s": job.get("elapsed_s"),
+    }
+
+
+@app.route("/api/hod/generate-timetable/stream", methods=["GET", "POST"])
+def generate_timetable_stream():
+    """
+    Server-Sent Events for a generation job.
+    GET ?job_id=… follows an existing job (EventSource);
+    POST starts a new one and streams it.
+    Events: progress (every change), done (result or error).
+    """
+    if request.method == "POST":
+        job_id, _ = submit_generation()
+    else:
+        job_id = request.args.get("job_id")
+        if not job_id:
+            return jsonify({"error": "job_id is required"}), 400
+
+    if jobs.get_job(job_id) is None:
+        return jsonify({"error": "Unknown job"}), 404
+
+    # EventSource resends the last id after a reconnect; anything
+    # unparseable just replays from the start
+    try:
+        last_seq = int(request.headers.get("Last-Event-ID") or -1)
+    except ValueError:
+        last_seq = -1
+
+    def stream():
+        seq = last_seq
+        while True:
+            job = jobs.wait_for_change(job_id, seq, SSE_KEEPALIVE_SECONDS)
+            if job is None:
+                yield sse_event("done", {"status": "failed", "error": "Unknown job"})
+                return
+
+            if jobs.is_finished(job):
+                yield sse_event("done", dict(
+                    progress_payload(job),
+                    job_id=job_id,
+                    result=job["result"],
+                    error=job["error"]
+                ), job["seq"])
+                return
+
+            if job["seq"] == seq:
+                yield ": keepalive\n\n"
+                continue
+
+            seq = job["seq"]
+            yield sse_event("progress", dict(progress_payload(job), job_id=job_id), seq)
+
+    return Response(
+        stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# =====================================================
+# TIMETABLE VERSIONS (LIST / ROLLBACK)
+# =====================================================
+
+@app.route("/api/hod/timetable-versions")
+def timetable_versions():
+    with connection() as conn, conn.cursor() as cur:
+        versions = list_versions(cur)
+    return jsonify(versions)
+
+
+@app.route("/api/hod/timetable-versions/<int:version_id>/activate", methods=["POST"])
+def activate_timetable_version(version_id):
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT 1 FROM timetable_versions WHERE version_id = %s",
+            (version_id,)
+        )
+        if not cur.fetchone():
+            return jsonify({"error": f"Unknown timetable version {version_id}"}), 404
+
+        # names / short names may have changed since it was rendered
+        timetable_render.render_version(cur, version_id)
+        activate_version(cur, version_id)
+        conn.commit()
+    invalidate_tags(["timetable"])
+
+    return jsonify({"message": "Timetable version activated", "version_id": version_id})
 
 
 # =====================================================
@@ -868,66 +929,19 @@ def api_generate_timetable():
 # =====================================================
 
 @app.route("/api/hod/timetable")
+@cached(lambda args: ["timetable", f"class:{args.get('class_id')}"])
 def hod_timetable():
-    class_id = request.args.get("class_id")
+    class_id = request.args.get("class_id", type=int)
+    if class_id is None:
+        return jsonify([])
 
-    conn = get_connection()
-    cur = conn.cursor()
-
-    # JOIN with faculty_subject_preferences to get the assigned short_name
-    cur.execute("""
-        SELECT
-            t.day,
-            t.start_time,
-            t.end_time,
-            s.subject_name,
-            COALESCE(pref.short_name, LEFT(te.teacher_name, 3)) as short_name,
-            t.is_lab,
-            t.batch_id
-        FROM timetable t
-        JOIN subjects s ON s.subject_id = t.subject_id
-        JOIN teachers te ON te.teacher_id = t.teacher_id
-        LEFT JOIN faculty_subject_preferences pref 
-            ON pref.faculty_id = t.teacher_id 
-            AND pref.year_level = (SELECT LEFT(class_name, 2) FROM classes WHERE class_id = %s)
-            AND pref.allocated_subject = s.subject_name
-        WHERE t.class_id = %s
-        ORDER BY 
-            CASE 
-                WHEN t.day IN ('Monday', 'Mon') THEN 1
-                WHEN t.day IN ('Tuesday', 'Tue') THEN 2
-                WHEN t.day IN ('Wednesday', 'Wed') THEN 3
-                WHEN t.day IN ('Thursday', 'Thu') THEN 4
-                WHEN t.day IN ('Friday', 'Fri') THEN 5
-                ELSE 6
-            END,
-            t.start_time
-    """, (class_id, class_id))
-
-    rows = cur.fetchall()
-    result = []
-    
-    for row in rows:
-        day, start_time, end_time, subject, short_name, is_lab, batch_id = row
-        
-        if is_lab and batch_id:
-            cur.execute("SELECT batch_name FROM class_batches WHERE batch_id = %s", (batch_id,))
-            batch_row = cur.fetchone()
-            batch_name = batch_row[0] if batch_row else f"B{batch_id}"
-            display = f"{subject} ({short_name})<br>{batch_name}"
-        else:
-            display = f"{subject} ({short_name})"
+    with connection() as conn, conn.cursor() as cur:
+        # Rendered at save time – one keyed row, no joins
+        payload = timetable_render.fetch_view(cur, timetable_render.CLASS, class_id)
+        if payload is None:
+            return jsonify(timetable_render.live_class_view(cur, class_id))
 
-        result.append({
-            "day": day,
-            "start_time": str(start_time),
-            "end_time": str(end_time),
-            "display": display
-        })
-    
-    cur.close()
-    conn.close()
-    return jsonify(result)
+    return Response(payload, mimetype="application/json")
 
 
 # =====================================================
@@ -935,91 +949,86 @@ def hod_timetable():
 # =====================================================
 
 @app.route("/api/timetable")
+@cached(lambda args: [
+    "timetable",
+    f"teacher:{args['teacher_id']}" if args.get("teacher_id") else "timetable:all"
+])
 def faculty_timetable():
-    """Get timetable entries for a specific teacher"""
-    teacher_id = request.args.get("teacher_id")
-    
-    conn = get_connection()
-    cur = conn.cursor()
-
-    if teacher_id:
-        # Get specific teacher's timetable
-        cur.execute("""
-            SELECT
-                c.class_name,
-                s.subject_name,
-                t.teacher_name,
-                tt.day,
-                tt.start_time,
-                tt.end_time,
-                s.is_lab,
-                cb.batch_name
-            FROM timetable tt
-            JOIN classes c ON c.class_id = tt.class_id
-            JOIN subjects s ON s.subject_id = tt.subject_id
-            JOIN teachers t ON t.teacher_id = tt.teacher_id
-            LEFT JOIN class_batches cb ON cb.batch_id = tt.batch_id
-            WHERE tt.teacher_id = %s
-            ORDER BY 
-                CASE 
-                    WHEN tt.day IN ('Monday', 'Mon') THEN 1
-                    WHEN tt.day IN ('Tuesday', 'Tue') THEN 2
-                    WHEN tt.day IN ('Wednesday', 'Wed') THEN 3
-                    WHEN tt.day IN ('Thursday', 'Thu') THEN 4
-                    WHEN tt.day IN ('Friday', 'Fri') THEN 5
-                    ELSE 6
-                END,
-                tt.start_time
-        """, (teacher_id,))
-    else:
-        # Get all timetable entries
-        cur.execute("""
-            SELECT
-                c.class_name,
-                s.subject_name,
-                t.teacher_name,
-                tt.day,
-                tt.start_time,
-                tt.end_time,
-                s.is_lab,
-                cb.batch_name
-            FROM timetable tt
-            JOIN classes c ON c.class_id = tt.class_id
-            JOIN subjects s ON s.subject_id = tt.subject_id
-            JOIN teachers t ON t.teacher_id = tt.teacher_id
-            LEFT JOIN class_batches cb ON cb.batch_id = tt.batch_id
-            ORDER BY 
-                CASE 
-                    WHEN tt.day IN ('Monday', 'Mon') THEN 1
-                    WHEN tt.day IN ('Tuesday', 'Tue') THEN 2
-                    WHEN tt.day IN ('Wednesday', 'Wed') THEN 3
-                    WHEN tt.day IN ('Thursday', 'Thu') THEN 4
-                    WHEN tt.day IN ('Friday', 'Fri') THEN 5
-                    ELSE 6
-                END,
-                tt.start_time
-        """)
+    """Get timetable entries for a specific teacher (or everyone)"""
+    if TIMETABLE_QUERY_ARGS & set(request.args):
+        return query_timetable()
+
+    teacher_id = request.args.get("teacher_id", type=int)
+
+    with connection() as conn, conn.cursor() as cur:
+        if teacher_id:
+            payload = timetable_render.fetch_view(cur, timetable_render.TEACHER, teacher_id)
+        else:
+            payload = timetable_render.fetch_view(cur, timetable_render.ALL)
+
+        # Versions saved before migrations/003 have no rendered views
+        if payload is None:
+            return jsonify(timetable_render.live_teacher_view(cur, teacher_id))
+
+    return Response(payload, mimetype="application/json")
+
+
+# =====================================================
+# CLASS TIMETABLE GRIDS (public board / HOD view)
+# =====================================================
+
+def _grid_class_ids(args):
+    value = args.get("class_ids") or ""
+    return [int(v) for v in value.split(",") if v.strip().isdigit()]
+
+
+@app.route("/api/timetable/grid")
+@cached(lambda args: ["timetable"] + (
+    [f"class:{c}" for c in _grid_class_ids(args)] or ["timetable:all"]
+))
+def timetable_grid():
+    """?class_ids=1,2,3 (omit for every class) → day × slot grids, one query"""
+    with connection() as conn, conn.cursor() as cur:
+        grids = timetable_render.live_class_grids(cur, _grid_class_ids(request.args))
+    return jsonify(grids)
+
+
+# Any of these switch /api/timetable to filtered / paged rows
+TIMETABLE_QUERY_ARGS = {"after", "limit", "class_id", "class", "day", "type", "fields", "format"}
+
+# NDJSON lines sent per chunk
+NDJSON_CHUNK_ROWS = 200
 
-    rows = cur.fetchall()
-    result = []
-    
-    for row in rows:
-        class_name, subject, teacher, day, start_time, end_time, is_lab, batch_name = row
-        
-        result.append({
-            "class": class_name,
-            "subject": subject,
-            "teacher": teacher,
-            "day": day,
-            "start_time": str(start_time),
-            "end_time": str(end_time),
-            "type": "LAB" if is_lab else "LECTURE",
-            "batch": batch_name
-        })
-    
-    cur.close()
-    conn.close()
-    return jsonify(result)
+
+def query_timetable():
+    """
+    ?class_id= / class= / day= / type=LAB|LECTURE / teacher_id=
+    ?fields=class,subject,...   projection
+    ?limit=&after=d,s,id        keyset pages → {"items", "next_after"}
+    ?format=ndjson              every match, one JSON object per line
+    """
+    try:
+        query = timetable_query.parse_query(request.args)
+    except timetable_query.QueryError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if request.args.get("format") == "ndjson":
+        def generate():
+            with connection() as conn:
+                lines = []
+                for item in timetable_query.stream_rows(conn, query):
+                    lines.append(responses.dumps(item) + "\n")
+                    if len(lines) >= NDJSON_CHUNK_ROWS:
+                        yield "".join(lines)
+                        lines = []
+                if lines:
+                    yield "".join(lines)
+
+        return Response(generate(), mimetype="application/x-ndjson")
+
+    with connection() as conn, conn.cursor() as cur:
+        page = timetable_query.fetch_page(cur, query)
+    return jsonify(page)
 
 
 # =====================================================
@@ -1027,29 +1036,26 @@ def faculty_timetable():
 # =====================================================
 
 @app.route("/api/classes")
+@cached(lambda args: ["classes"])
 def get_classes():
     year = request.args.get("year")  # SE / TE / BE
 
-    conn = get_connection()
-    cur = conn.cursor()
-
-    if year:
-        cur.execute("""
-            SELECT class_id, class_name
-            FROM classes
-            WHERE class_name LIKE %s
-            ORDER BY class_name
-        """, (f"{year}-%",))
-    else:
-        cur.execute("""
-            SELECT class_id, class_name
-            FROM classes
-            ORDER BY class_name
-        """)
+    with connection() as conn, conn.cursor() as cur:
+        if year:
+            cur.execute("""
+                SELECT class_id, class_name
+                FROM classes
+                WHERE class_name LIKE %s
+                ORDER BY class_name
+            """, (f"{year}-%",))
+        else:
+            cur.execute("""
+                SELECT class_id, class_name
+                FROM classes
+                ORDER BY class_name
+            """)
 
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+        rows = cur.fetchall()
 
     return jsonify([
         {"class_id": r[0], "class_name": r[1]}
@@ -1061,17 +1067,14 @@ def get_classes():
 def get_class_batches():
     class_id = request.args.get("class_id")
 
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT batch_id, batch_name
-        FROM class_batches
-        WHERE class_id = %s
-        ORDER BY batch_name
-    """, (class_id,))
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT batch_id, batch_name
+            FROM class_batches
+            WHERE class_id = %s
+            ORDER BY batch_name
+        """, (class_id,))
+        rows = cur.fetchall()
 
     return jsonify([
         {"batch_id": r[0], "batch_name": r[1]}
@@ -1082,49 +1085,12 @@ def get_class_batches():
 @app.route("/api/hod/allot-practical", methods=["POST"])
 def allot_practical():
     try:
-        d = request.json
-
-        conn = get_connection()
-        cur = conn.cursor()
-
-        # ---------------------------------------------
-        # 1. Prevent duplicate allocation
-        # ---------------------------------------------
-        cur.execute("""
-            SELECT 1
-            FROM teacher_batch_subject_allocation
-            WHERE teacher_id = %s
-              AND subject_id = %s
-              AND class_id = %s
-              AND batch_id = %s
-        """, (
-            d["faculty_id"],
-            d["subject_id"],
-            d["class_id"],
-            d["batch_id"]
-        ))
+        with connection() as conn, conn.cursor() as cur:
+            inserted = allot_practicals(cur, [request.json])
+            conn.commit()
 
-        if cur.fetchone():
+        if not inserted:
             return jsonify({"message": "Already allotted"}), 200
-
-        # ---------------------------------------------
-        # 2. Insert allocation
-        # ---------------------------------------------
-        cur.execute("""
-            INSERT INTO teacher_batch_subject_allocation
-            (teacher_id, subject_id, class_id, batch_id)
-            VALUES (%s, %s, %s, %s)
-        """, (
-            d["faculty_id"],
-            d["subject_id"],
-            d["class_id"],
-            d["batch_id"]
-        ))
-
-        conn.commit()
-        cur.close()
-        conn.close()
-
         return jsonify({"message": "Practical allotted successfully"})
 
     except Exception as e:
@@ -1132,6 +1098,29 @@ def allot_practical():
         return jsonify({"error": "Failed to allot practical"}), 500
 
 
+@app.route("/api/hod/allot-practical/bulk", methods=["POST"])
+def allot_practical_bulk():
+    """{"allocations": [{faculty_id, subject_id, class_id, batch_id}, ...]} in one transaction"""
+    allocations = (request.json or {}).get("allocations") or []
+
+    try:
+        with connection() as conn, conn.cursor() as cur:
+            inserted = allot_practicals(cur, allocations)
+            conn.commit()
+
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid allocation: {e}"}), 400
+    except Exception as e:
+        print("BULK ALLOT PRACTICAL ERROR:", e)
+        return jsonify({"error": "Failed to allot practicals"}), 500
+
+    return jsonify({
+        "message": "Practicals allotted successfully",
+        "inserted": len(inserted),
+        "skipped": len(allocations) - len(inserted)
+    })
+
+
 
 # =====================================================
 # HELPER / INTERNAL
@@ -1139,16 +1128,13 @@ def allot_practical():
 
 @app.route("/api/hod/configured-years")
 def configured_years():
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT DISTINCT year_level, semester
-        FROM subject_load_config
-        ORDER BY year_level, semester
-    """)
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT DISTINCT year_level, semester
+            FROM subject_load_config
+            ORDER BY year_level, semester
+        """)
+        rows = cur.fetchall()
 
     return jsonify([
         {"year_level": r[0], "semester": r[1]}
@@ -1157,16 +1143,13 @@ def configured_years():
 
 @app.route("/api/internal/subject-load-map")
 def subject_load_map():
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT subject_id, year_level, semester,
-               weekly_theory_load, weekly_practical_load
-        FROM subject_load_config
-    """)
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT subject_id, year_level, semester,
+                   weekly_theory_load, weekly_practical_load
+            FROM subject_load_config
+        """)
+        rows = cur.fetchall()
 
     return jsonify([
         {
@@ -1181,78 +1164,25 @@ def subject_load_map():
 
 @app.route("/api/hod/recalculate-weekly-load", methods=["POST"])
 def recalculate_weekly_load():
-    try:
-        conn = get_connection()
-        cur = conn.cursor()
-
-        # =====================================================
-        # 1. RESET WEEKLY LOAD TABLE
-        # =====================================================
-        cur.execute("TRUNCATE teacher_weekly_load")
+    """
+    Incremental by default: only (teacher, subject, class) keys
+    logged since the last run are recomputed. Body {"full": true}
+    (or ?full=1) rebuilds the whole table.
+    """
+    body = request.get_json(silent=True) or {}
+    full = bool(body.get("full")) or request.args.get("full") in ("1", "true")
 
-        # =====================================================
-        # 2. INSERT THEORY LOADS (ONE ROW PER SUBJECT)
-        # =====================================================
-        cur.execute("""
-            INSERT INTO teacher_weekly_load (
-                teacher_id,
-                subject_id,
-                class_id,
-                weekly_theory_load,
-                weekly_practical_load
-            )
-            SELECT
-                tsa.teacher_id,
-                tsa.subject_id,
-                tsa.class_id,
-                slc.weekly_theory_load,
-                0
-            FROM teacher_subject_allocation tsa
-            JOIN subject_load_config slc
-              ON slc.subject_id = tsa.subject_id
-        """)
-
-        # =====================================================
-        # 3. MERGE PRACTICAL LOADS (AGGREGATED PER SUBJECT)
-        # =====================================================
-        cur.execute("""
-            INSERT INTO teacher_weekly_load (
-                teacher_id,
-                subject_id,
-                class_id,
-                weekly_theory_load,
-                weekly_practical_load
-            )
-            SELECT
-                tbsa.teacher_id,
-                tbsa.subject_id,
-                tbsa.class_id,
-                0,
-                MAX(slc.weekly_practical_load)
-            FROM teacher_batch_subject_allocation tbsa
-            JOIN subject_load_config slc
-              ON slc.subject_id = tbsa.subject_id
-            GROUP BY
-                tbsa.teacher_id,
-                tbsa.subject_id,
-                tbsa.class_id
-            ON CONFLICT (teacher_id, subject_id, class_id)
-            DO UPDATE
-            SET weekly_practical_load = EXCLUDED.weekly_practical_load
-        """)
-
-        conn.commit()
-        cur.close()
-        conn.close()
+    try:
+        with connection() as conn, conn.cursor() as cur:
+            if full:
+                result = weekly_load.recalculate_full(cur)
+            else:
+                result = weekly_load.recalculate_incremental(cur)
+            conn.commit()
 
-        return jsonify({
-            "message": "Weekly load recalculated successfully"
-        })
+        return jsonify(dict(result, message="Weekly load recalculated successfully"))
 
     except Exception as e:
-        conn.rollback()
-        cur.close()
-        conn.close()
         print("RECALC LOAD ERROR:", e)
         return jsonify({"error": str(e)}), 500
 
@@ -1260,21 +1190,11 @@ def recalculate_weekly_load():
 
 @app.route("/hod/generate-timetable")
 def hod_generate_timetable():
-    with open("frontend/hod/generate_timetable.html", encoding='utf-8') as f:
-        return render_template_string(
-            HOD_LAYOUT,
-            title="Generate Timetable",
-            content=f.read()
-        )
+    return render_page(HOD_LAYOUT, "hod/generate_timetable.html", "Generate Timetable")
 
 @app.route("/hod/view-timetable")
 def hod_view_timetable():
-    with open("frontend/hod/view_timetable.html", encoding='utf-8') as f:
-        return render_template_string(
-            HOD_LAYOUT,
-            title="View Timetable",
-            content=f.read()
-        )
+    return render_page(HOD_LAYOUT, "hod/view_timetable.html", "View Timetable")
 
 # =====================================================
 # RUN
@@ -0,0 +1,157 @@
+# assets.py
+# =====================================================
+# STATIC ASSET PIPELINE
+# CSS / JS under frontend/ are fingerprinted by content
+# hash (/hod/hod.css → /assets/hod/hod.<hash>.css) and
+# precompressed once at startup. Fingerprinted URLs never
+# change content, so they are served immutable with a
+# one-year max-age; pages reference them via rewrite_html.
+#
+# brotli is optional: pip install brotli
+# =====================================================
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from flask import Response, abort, current_app, has_app_context, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+ASSET_EXTENSIONS = (".css", ".js")
+ASSET_PREFIX = "/assets/"
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+# Not worth compressing below this
+COMPRESS_MIN_BYTES = 256
+
+# logical url → fingerprinted url, fingerprinted url → entry
+_manifest = {}
+_files = {}
+_mtimes = {}
+_version = 0
+_lock = threading.Lock()
+
+
+# -------------------------------
+# BUILD
+# -------------------------------
+def _asset_paths():
+    """Relative paths of every fingerprintable file under frontend/"""
+    for root, _, names in os.walk(FRONTEND_DIR):
+        for name in names:
+            if name.endswith(ASSET_EXTENSIONS):
+                yield os.path.relpath(os.path.join(root, name), FRONTEND_DIR).replace(os.sep, "/")
+
+
+def _entry(rel):
+    with open(os.path.join(FRONTEND_DIR, rel), "rb") as f:
+        body = f.read()
+
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    stem, ext = os.path.splitext(rel)
+    entry = {
+        "url": f"{ASSET_PREFIX}{stem}.{digest}{ext}",
+        "etag": digest,
+        "mimetype": mimetypes.guess_type(rel)[0] or "application/octet-stream",
+        "identity": body,
+    }
+
+    if len(body) >= COMPRESS_MIN_BYTES:
+        entry["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            entry["br"] = brotli.compress(body, quality=11)
+    return entry
+
+
+def build():
+    """(Re)fingerprints and compresses every asset"""
+    global _version
+    manifest, files, mtimes = {}, {}, {}
+
+    for rel in _asset_paths():
+        entry = _entry(rel)
+        manifest["/" + rel] = entry["url"]
+        files[entry["url"]] = entry
+        mtimes[rel] = os.path.getmtime(os.path.join(FRONTEND_DIR, rel))
+
+    with _lock:
+        _manifest.clear()
+        _manifest.update(manifest)
+        _files.clear()
+        _files.update(files)
+        _mtimes.clear()
+        _mtimes.update(mtimes)
+        _version += 1
+    print(f"📦 Assets: {len(files)} fingerprinted" + ("" if brotli else " (gzip only)"))
+
+
+def _stale():
+    """Any asset added, removed or edited since the last build"""
+    try:
+        return _mtimes != {
+            rel: os.path.getmtime(os.path.join(FRONTEND_DIR, rel))
+            for rel in _asset_paths()
+        }
+    except OSError:
+        return True
+
+
+def version():
+    """Bumped on every build – page caches key on it"""
+    if not _version or (has_app_context() and current_app.jinja_env.auto_reload and _stale()):
+        build()
+    return _version
+
+
+# -------------------------------
+# URLS
+# -------------------------------
+_REF = re.compile(r'((?:src|href)=")(/[^"?#]+\.(?:css|js))(")')
+
+
+def asset_url(url):
+    """Fingerprinted URL of "/hod/hod.css", or the URL itself if unknown"""
+    version()
+    return _manifest.get(url, url)
+
+
+def rewrite_html(html):
+    """Points src/href attributes at fingerprinted asset URLs"""
+    version()
+    return _REF.sub(lambda m: m.group(1) + _manifest.get(m.group(2), m.group(2)) + m.group(3), html)
+
+
+# -------------------------------
+# SERVE
+# -------------------------------
+def _encoding(entry):
+    accepted = request.headers.get("Accept-Encoding", "")
+    for enc in ("br", "gzip"):
+        if enc in entry and enc in accepted:
+            return enc
+    return "identity"
+
+
+def serve(path):
+    """/assets/<path> – immutable, conditional, precompressed"""
+    version()
+    entry = _files.get(ASSET_PREFIX + path)
+    if entry is None:
+        abort(404)
+
+    enc = _encoding(entry)
+    resp = Response(entry[enc], mimetype=entry["mimetype"])
+    if enc != "identity":
+        resp.headers["Content-Encoding"] = enc
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.headers["Cache-Control"] = f"public, max-age={ASSET_MAX_AGE}, immutable"
+    resp.set_etag(f"{entry['etag']}-{enc}")
+    return resp.make_conditional(request)
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from db import get_connection
+from db import connection
 
 auth = Blueprint("auth", __name__)
 
@@ -9,18 +9,14 @@ def login():
     email = data.get("email")
     password = data.get("password")
 
-    conn = get_connection()
-    cur = conn.cursor()
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT user_id, name, role 
+            FROM users
+            WHERE email=%s AND password=%s
+        """, (email, password))
 
-    cur.execute("""
-        SELECT user_id, name, role 
-        FROM users
-        WHERE email=%s AND password=%s
-    """, (email, password))
-
-    user = cur.fetchone()
-    cur.close()
-    conn.close()
+        user = cur.fetchone()
 
     if not user:
         return jsonify({"error": "Invalid credentials"}), 401
@@ -0,0 +1,295 @@
+# benchmarks/run_benchmarks.py
+# =====================================================
+# SOLVER BENCHMARKS WITH BASELINE REGRESSION GATE
+# Times the generator, every constraints.check_*, fitness
+# and one GA generation on synthetic datasets.
+#
+#   python benchmarks/run_benchmarks.py                    # compare
+#   python benchmarks/run_benchmarks.py --update-baseline  # re-record
+# =====================================================
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import constraints                                   # noqa: E402
+import ga_optimizer                                  # noqa: E402
+from fitness import fitness                          # noqa: E402
+from generator import (                              # noqa: E402
+    generate_all_labs,
+    generate_class_lectures,
+    generate_timetable,
+    build_weekly_load_map,
+)
+from synthetic_data import generate_institution, divisions_for_scale  # noqa: E402
+
+BASELINE_FILE = os.path.join(HERE, "baseline.json")
+
+DEFAULT_SIZES = [1, 3, 10]
+DEFAULT_REPEATS = 5
+DEFAULT_THRESHOLD = 0.25
+
+# Metrics compared against the baseline
+TRACKED_METRICS = ["wall_s", "peak_kb"]
+
+# Below these floors timer / allocator noise dominates – never gated
+NOISE_FLOOR = {"wall_s": 0.002, "peak_kb": 64}
+
+
+# -----------------------------------------------------
+# BENCHMARK DEFINITIONS
+# Each: setup(ctx) → state, run(state) → ops performed
+# -----------------------------------------------------
+def quiet(fn, *args, **kwargs):
+    """Runs fn with the generator's progress prints silenced"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def _labs_setup(ctx):
+    return ctx["data"]
+
+
+def _labs_run(data):
+    return len(generate_all_labs(data, {}))
+
+
+def _lectures_setup(ctx):
+    busy = {}
+    generate_all_labs(ctx["data"], busy)
+    return ctx["data"], busy
+
+
+def _lectures_run(state):
+    data, busy = state
+    daily = defaultdict(lambda: defaultdict(int))
+    placed = 0
+    for class_id, class_name in sorted(data["class_map"].items(), key=lambda x: x[1]):
+        placed += len(generate_class_lectures(class_id, class_name, data, busy, daily))
+    return placed
+
+
+def _generate_run(data):
+    return len(quiet(generate_timetable, data))
+
+
+def _fitness_run(timetable):
+    fitness(timetable)
+    return len(timetable)
+
+
+def _ga_setup(ctx):
+    random.seed(0)
+    base = ctx["timetable"]
+    return [ga_optimizer.mutate(base) for _ in range(ga_optimizer.POPULATION_SIZE)]
+
+
+def _ga_run(population):
+    quiet(ga_optimizer.run_generation, population)
+    return len(population)
+
+
+def _check_benchmarks():
+    """One benchmark per constraints.check_* function"""
+    def whole(fn, *extra):
+        def run(ctx):
+            quiet(fn, ctx["timetable"], *[ctx[k] for k in extra])
+            return len(ctx["timetable"])
+        return run
+
+    def per_entry(fn, *extra):
+        def run(ctx):
+            args = [ctx[k] for k in extra]
+            for e in ctx["timetable"]:
+                fn(e, *args)
+            return len(ctx["timetable"])
+        return run
+
+    runners = {
+        "check_teacher_clash": whole(constraints.check_teacher_clash),
+        "check_class_clash": whole(constraints.check_class_clash),
+        "check_slot_validity": per_entry(constraints.check_slot_validity),
+        "check_weekly_load": whole(constraints.check_weekly_load, "weekly_load_map"),
+        "check_daily_limits": whole(constraints.check_daily_limits, "teacher_limits"),
+        "check_allocation_validity": per_entry(
+            constraints.check_allocation_validity,
+            "allocation_set",
+            "batch_allocation_set"
+        ),
+        "check_lab_continuity": whole(constraints.check_lab_continuity),
+        "check_batch_subject_uniqueness": whole(constraints.check_batch_subject_uniqueness),
+    }
+
+    missing = sorted(
+        name for name in dir(constraints)
+        if name.startswith("check_") and name not in runners
+    )
+    if missing:
+        raise RuntimeError(f"No benchmark registered for {', '.join(missing)}")
+
+    return [
+        (f"constraints.{name}", lambda ctx: ctx, run)
+        for name, run in runners.items()
+    ]
+
+
+def all_benchmarks():
+    return [
+        ("generate_all_labs", _labs_setup, _labs_run),
+        ("generate_class_lectures", _lectures_setup, _lectures_run),
+        ("generate_timetable", lambda ctx: ctx["data"], _generate_run),
+        *_check_benchmarks(),
+        ("fitness", lambda ctx: ctx["timetable"], _fitness_run),
+        ("ga_generation", _ga_setup, _ga_run),
+    ]
+
+
+# -----------------------------------------------------
+# MEASUREMENT
+# -----------------------------------------------------
+def build_context(scale):
+    data = generate_institution(divisions_for_scale(scale), seed=0)
+    timetable = quiet(generate_timetable, data)
+    return {
+        "data": data,
+        "timetable": timetable,
+        "weekly_load_map": build_weekly_load_map(data["weekly_loads"]),
+        "teacher_limits": data["teacher_limits"],
+        "allocation_set": data["allocation_set"],
+        "batch_allocation_set": data["batch_allocation_set"],
+    }
+
+
+def measure(ctx, setup, run, repeats):
+    """Best-of-N wall time (GC paused, as timeit does), then one traced run for peak memory"""
+    best = None
+    ops = 0
+    for _ in range(repeats):
+        state = quiet(setup, ctx)
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            ops = run(state)
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+
+    state = quiet(setup, ctx)
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "wall_s": round(best, 6),
+        "peak_kb": round(peak / 1024, 1),
+        "ops_per_s": round(ops / best, 1) if best else None,
+    }
+
+
+def run_suite(sizes, repeats):
+    results = {}
+    for scale in sizes:
+        key = f"x{scale}"
+        ctx = build_context(scale)
+        print(f"\n📏 {key}: {len(ctx['data']['classes'])} classes, "
+              f"{len(ctx['timetable'])} entries")
+
+        results[key] = {}
+        for name, setup, run in all_benchmarks():
+            m = measure(ctx, setup, run, repeats)
+            results[key][name] = m
+            print(f"  {name:45} {m['wall_s'] * 1000:10.2f} ms "
+                  f"{m['peak_kb']:10.1f} KB {m['ops_per_s'] or 0:14.0f} ops/s")
+    return results
+
+
+# -----------------------------------------------------
+# BASELINE GATE
+# -----------------------------------------------------
+def compare(results, baseline, threshold):
+    """Returns a list of regression messages (empty = pass)"""
+    regressions = []
+    for size, benches in results.items():
+        for name, metrics in benches.items():
+            base = baseline.get(size, {}).get(name)
+            if not base:
+                continue
+            for metric in TRACKED_METRICS:
+                old, new = base.get(metric), metrics.get(metric)
+                if old is None or new is None:
+                    continue
+                if max(old, new) < NOISE_FLOOR[metric]:
+                    continue
+                limit = max(old, NOISE_FLOOR[metric]) * (1 + threshold)
+                if new > limit:
+                    regressions.append(
+                        f"{size} {name} {metric}: {old} → {new} "
+                        f"(+{(new / old - 1) * 100 if old else float('inf'):.0f}%)"
+                    )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Timetable solver benchmarks")
+    parser.add_argument(
+        "--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+        help="comma-separated multiples of today's 7 divisions"
+    )
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="allowed relative slowdown / memory growth (0.25 = 25%%)"
+    )
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="also write this run's results as JSON")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    results = run_suite(sizes, args.repeats)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n💾 Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n⚠️  No baseline at {args.baseline} – run with --update-baseline")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for r in regressions:
+            print(f"  {r}")
+        return 1
+
+    print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+# cache.py
+# =====================================================
+# READ-THROUGH RESPONSE CACHE
+# Bounded LRU with TTL, keyed by path + query string.
+# Entries carry tags ("class:5", "teacher:7", ...) so a
+# generation only invalidates the views it changed.
+#
+# Backends:
+# - memory (default): per process – only valid with a
+#   single worker, other workers never see invalidations
+# - sqlite: set RESPONSE_CACHE_SQLITE=/path/cache.db to
+#   share one cache between worker processes on a host;
+#   chosen automatically when WEB_CONCURRENCY > 1
+# =====================================================
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import Response, make_response, request
+
+from responses import compress
+
+CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+CACHE_SQLITE_PATH = os.getenv("RESPONSE_CACHE_SQLITE")
+
+# Worker processes on this host (gunicorn reads the same variable)
+WEB_WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+
+# -------------------------------
+# BACKENDS
+# entry = {"body": bytes, "mimetype": str, "etag": str}
+# -------------------------------
+class MemoryCache:
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key → (expires, entry, tags)
+        self._tags = {}                 # tag → {key}
+        self._lock = threading.Lock()
+
+    def _drop(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[0] < time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return item[1]
+
+    def set(self, key, entry, tags=()):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.time() + self.ttl, entry, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tags.get(tag, set())
+            for key in keys:
+                self._drop(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+
+class SqliteCache:
+    """Same interface, stored in a local SQLite file shared by processes"""
+
+    def __init__(self, path, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key       TEXT PRIMARY KEY,
+                body      BLOB NOT NULL,
+                mimetype  TEXT NOT NULL,
+                etag      TEXT NOT NULL,
+                expires   REAL NOT NULL,
+                used      REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS response_cache_tags (
+                tag  TEXT NOT NULL,
+                key  TEXT NOT NULL,
+                PRIMARY KEY (tag, key)
+            );
+        """)
+        self._db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, mimetype, etag FROM response_cache WHERE key = ? AND expires >= ?",
+                (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE response_cache SET used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        return {"body": row[0], "mimetype": row[1], "etag": row[2]}
+
+    def set(self, key, entry, tags=()):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, entry["body"], entry["mimetype"], entry["etag"], now + self.ttl, now)
+            )
+            self._db.execute("DELETE FROM response_cache_tags WHERE key = ?", (key,))
+            self._db.executemany(
+                "INSERT OR IGNORE INTO response_cache_tags VALUES (?, ?)",
+                [(tag, key) for tag in tags]
+            )
+            # expired first, then least recently used beyond the bound
+            self._db.execute("DELETE FROM response_cache WHERE expires < ?", (now,))
+            self._db.execute("""
+                DELETE FROM response_cache WHERE key IN (
+                    SELECT key FROM response_cache
+                    ORDER BY used DESC
+                    LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self._db.execute(
+                "DELETE FROM response_cache_tags WHERE key NOT IN (SELECT key FROM response_cache)"
+            )
+            self._db.commit()
+
+    def invalidate_tags(self, tags):
+        tags = list(tags)
+        if not tags:
+            return 0
+        marks = ", ".join("?" * len(tags))
+        with self._lock:
+            cur = self._db.execute(f"""
+                DELETE FROM response_cache WHERE key IN (
+                    SELECT key FROM response_cache_tags WHERE tag IN ({marks})
+                )
+            """, tags)
+            self._db.execute(
+                "DELETE FROM response_cache_tags WHERE key NOT IN (SELECT key FROM response_cache)"
+            )
+            self._db.commit()
+            return cur.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM response_cache")
+            self._db.execute("DELETE FROM response_cache_tags")
+            self._db.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _new_cache():
+    path = CACHE_SQLITE_PATH
+    if not path and WEB_WORKERS > 1:
+        # A per-process cache would keep serving stale views after
+        # another worker publishes, so share one file between them
+        uid = os.getuid() if hasattr(os, "getuid") else os.getenv("USERNAME", "user")
+        path = os.path.join(tempfile.gettempdir(), f"timetable_response_cache-{uid}.db")
+        print(f"🗄️ {WEB_WORKERS} workers – response cache shared via {path}")
+    return SqliteCache(path) if path else MemoryCache()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = _new_cache()
+    return _cache
+
+
+# -------------------------------
+# FLASK INTEGRATION
+# -------------------------------
+def cache_key(path, args):
+    """Same key for the same parameters in any order"""
+    query = urlencode(sorted(args.items(multi=True)))
+    return f"{path}?{query}" if query else path
+
+
+def cached(tags):
+    """
+    Caches a GET view's buffered 200 responses (streams pass
+    through). `tags(args)` names what the response depends on. Every response gets an ETag; a matching
+    If-None-Match is answered with 304 and no body. Large bodies
+    are compressed per the client's Accept-Encoding.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            key = cache_key(request.path, request.args)
+            entry = cache.get(key)
+
+            if entry is None:
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200 or resp.is_streamed:
+                    return resp
+                body = resp.get_data()
+                entry = {
+                    "body": body,
+                    "mimetype": resp.mimetype,
+                    "etag": hashlib.sha1(body).hexdigest(),
+                }
+                cache.set(key, entry, tags(request.args))
+
+            resp = Response(entry["body"], mimetype=entry["mimetype"])
+            resp.set_etag(entry["etag"])
+            resp.headers["Cache-Control"] = "no-cache"   # always revalidate
+            return compress(resp).make_conditional(request)
+        return wrapper
+    return decorator
+
+
+def invalidate_tags(tags):
+    return get_cache().invalidate_tags(tags)
+
+
+def invalidate_churn(churn):
+    """Drops the views a saved timetable diff touched"""
+    if not (churn["inserted"] or churn["updated"] or churn["deleted"]):
+        return 0
+    return invalidate_tags(
+        ["timetable:all"]
+        + [f"class:{c}" for c in churn["affected_classes"]]
+        + [f"teacher:{t}" for t in churn["affected_teachers"]]
+    )
@@ -289,6 +289,29 @@ def check_batch_subject_uniqueness(timetable):
     return True
 
 
+# -----------------------------------------------------
+# HC8: Class clash
+# -----------------------------------------------------
+def check_class_clash(timetable):
+    """
+    A lecture holds its class's (day, slot) alone: no second lecture
+    and no lab of any batch beside it. Parallel labs are left to
+    HC6 / HC7.
+    """
+    occupied = defaultdict(lambda: [0, 0])
+    # key = (class_id, day, slot) → [lectures, labs]
+
+    for e in timetable:
+        occupied[(e["class_id"], e["day"], get_slot(e))][bool(e["is_lab"])] += 1
+
+    for key, (lectures, labs) in occupied.items():
+        if lectures and lectures + labs > 1:
+            print(f"❌ Class clash at {key}: {lectures} lecture(s), {labs} lab(s)")
+            return False
+
+    return True
+
+
 # -----------------------------------------------------
 # MASTER VALIDATOR
 # -----------------------------------------------------
@@ -308,6 +331,10 @@ def validate_timetable(
     if not check_teacher_clash(timetable):
         return False
     print("✅ No teacher clashes")
+
+    if not check_class_clash(timetable):
+        return False
+    print("✅ No class clashes")
     
     if not check_lab_continuity(timetable):
         return False
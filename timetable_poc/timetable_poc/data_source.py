@@ -0,0 +1,153 @@
+# data_source.py
+# =====================================================
+# SOLVER INPUT SOURCES
+# - DatabaseSource: live Postgres (snapshot cached)
+# - FileSource: directory of CSV / JSON fixtures
+# Both return the dict shape of fetch_data.load_solver_input()
+# =====================================================
+
+import csv
+import json
+import os
+
+from db import connection
+from fetch_data import add_lookup_maps
+from snapshot import load_solver_input_cached
+
+# -------------------------------
+# FIXTURE TABLES
+# Column order matches the fetch_data SELECTs
+# -------------------------------
+TABLE_COLUMNS = {
+    "classes": ["class_id", "class_name"],
+    "subjects": ["subject_id", "subject_name", "is_lab"],
+    "teachers": [
+        "teacher_id", "teacher_name",
+        "max_lectures_per_day",
+        "max_practicals_per_day",
+        "max_lectures_per_week"
+    ],
+    "allocations": ["teacher_id", "subject_id", "class_id"],
+    "weekly_loads": [
+        "teacher_id", "subject_id", "class_id",
+        "weekly_theory_load", "weekly_practical_load"
+    ],
+    "batches": ["batch_id", "class_id", "batch_name"],
+    "batch_allocations": ["teacher_id", "subject_id", "class_id", "batch_id"],
+}
+
+# Tables that may be left out of a fixture directory
+OPTIONAL_TABLES = {"subjects"}
+
+
+def _coerce(value):
+    """CSV cells arrive as strings – restore ints, bools and NULLs"""
+    if not isinstance(value, str):
+        return value
+
+    v = value.strip()
+    if v == "":
+        return None
+    if v.lower() in ("true", "false"):
+        return v.lower() == "true"
+    try:
+        return int(v)
+    except ValueError:
+        return v
+
+
+def _read_rows(path, columns):
+    """Reads one fixture file into tuples ordered like `columns`"""
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            records = json.load(f)
+    else:
+        with open(path, encoding="utf-8", newline="") as f:
+            records = list(csv.DictReader(f))
+
+    rows = []
+    for r in records:
+        if isinstance(r, dict):
+            rows.append(tuple(_coerce(r.get(col)) for col in columns))
+        else:
+            rows.append(tuple(_coerce(v) for v in r))
+    return rows
+
+
+# -------------------------------
+# SOURCES
+# -------------------------------
+class DatabaseSource:
+    """Loads solver input from Postgres"""
+
+    def load(self):
+        with connection() as conn, conn.cursor() as cur:
+            return load_solver_input_cached(cur)
+
+
+class FileSource:
+    """
+    Loads solver input from <directory>/<table>.csv or .json,
+    one file per key of TABLE_COLUMNS.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _find(self, table):
+        for ext in (".json", ".csv"):
+            path = os.path.join(self.directory, table + ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def load(self):
+        data = {}
+
+        for table, columns in TABLE_COLUMNS.items():
+            path = self._find(table)
+            if path is None:
+                if table in OPTIONAL_TABLES:
+                    data[table] = []
+                    continue
+                raise FileNotFoundError(
+                    f"❌ Missing fixture {table}.csv / {table}.json "
+                    f"in {self.directory}"
+                )
+            data[table] = _read_rows(path, columns)
+
+        data["classes"].sort(key=lambda c: c[1])
+
+        return add_lookup_maps(data)
+
+
+def write_fixtures(data, directory):
+    """Dumps solver input as CSV fixtures readable by FileSource"""
+    os.makedirs(directory, exist_ok=True)
+
+    for table, columns in TABLE_COLUMNS.items():
+        path = os.path.join(directory, table + ".csv")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(data.get(table, []))
+
+
+def get_data_source(data_dir=None):
+    """FileSource when a fixture directory is given, else the database"""
+    data_dir = data_dir or os.getenv("TIMETABLE_DATA_DIR")
+    if data_dir:
+        return FileSource(data_dir)
+    return DatabaseSource()
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python data_source.py <fixture_dir>  →  export current DB input
+    if len(sys.argv) != 2:
+        print("Usage: python data_source.py <fixture_dir>")
+        sys.exit(1)
+
+    write_fixtures(DatabaseSource().load(), sys.argv[1])
+    print(f"✅ Fixtures written to {sys.argv[1]}")
@@ -1,16 +1,171 @@
 import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
 import os
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-def get_connection():
-    """Establish Supabase database connection using environment variables"""
-    return psycopg2.connect(
+# -------------------------------
+# POOL SETTINGS
+# -------------------------------
+POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+POOL_MAX = int(os.getenv("DB_POOL_MAX", "5"))
+
+# Connections idle longer than this are pinged before reuse
+HEALTH_CHECK_AFTER = float(os.getenv("DB_POOL_HEALTH_CHECK_SECONDS", "30"))
+
+# How long a request waits for a free connection
+CHECKOUT_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+
+
+def _connect_kwargs():
+    return dict(
         host=os.getenv("SUPABASE_DB_HOST"),
         port=os.getenv("SUPABASE_DB_PORT", "5432"),
         database=os.getenv("SUPABASE_DB_NAME"),
         user=os.getenv("SUPABASE_DB_USER"),
         password=os.getenv("SUPABASE_DB_PASSWORD")
     )
+
+
+def get_connection():
+    """
+    Establish a dedicated (unpooled) Supabase connection.
+    Prefer `with connection() as conn:` everywhere else.
+    """
+    return psycopg2.connect(**_connect_kwargs())
+
+
+# -------------------------------
+# SHARED POOL
+# -------------------------------
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(POOL_MAX)
+_last_used = {}   # id(conn) → time.monotonic() of last return
+
+
+def get_pool():
+    """Process-wide pool, created on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = psycopg2.pool.ThreadedConnectionPool(
+                    POOL_MIN, POOL_MAX, **_connect_kwargs()
+                )
+    return _pool
+
+
+def _is_healthy(conn):
+    if conn.closed:
+        return False
+
+    idle = time.monotonic() - _last_used.get(id(conn), 0)
+    if idle < HEALTH_CHECK_AFTER:
+        return True
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _checkout():
+    pool = get_pool()
+    for _ in range(POOL_MAX + 1):
+        conn = pool.getconn()
+        if _is_healthy(conn):
+            return conn
+        # Stale (server restart, idle timeout) – drop and retry
+        _last_used.pop(id(conn), None)
+        pool.putconn(conn, close=True)
+    raise psycopg2.OperationalError("❌ No healthy database connection available")
+
+
+def _checkin(conn, broken=False):
+    if not broken and not conn.closed:
+        status = conn.info.transaction_status
+        if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            # Uncommitted work (or a read's implicit transaction) is
+            # never handed to the next borrower
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+
+    if broken or conn.closed:
+        _last_used.pop(id(conn), None)
+        get_pool().putconn(conn, close=True)
+    else:
+        _last_used[id(conn)] = time.monotonic()
+        get_pool().putconn(conn)
+
+
+@contextmanager
+def connection():
+    """
+    Borrow a pooled connection:
+
+        with connection() as conn, conn.cursor() as cur:
+            ...
+            conn.commit()
+
+    Anything not committed is rolled back when the block exits,
+    and the connection is returned to the pool even on error.
+    """
+    if not _slots.acquire(timeout=CHECKOUT_TIMEOUT):
+        raise psycopg2.OperationalError("❌ Timed out waiting for a database connection")
+
+    conn = None
+    broken = False
+    try:
+        conn = _checkout()
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        try:
+            if conn is not None:
+                _checkin(conn, broken)
+        finally:
+            _slots.release()
+
+
+@contextmanager
+def advisory_lock(key, on_wait=None):
+    """
+    Cross-process mutex: a session-level pg advisory lock on `key`
+    held on its own pooled connection for the whole block.
+
+        with advisory_lock(GENERATION_LOCK_KEY) as was_free:
+            ...
+
+    If another session holds it, on_wait() is called and the block
+    waits for it; `was_free` tells the caller which case happened.
+    """
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT pg_try_advisory_lock(%s)", (key,))
+        was_free = cur.fetchone()[0]
+        if not was_free:
+            if on_wait is not None:
+                on_wait()
+            cur.execute("SELECT pg_advisory_lock(%s)", (key,))
+        conn.commit()   # the lock is session-level – don't sit idle in a transaction
+
+        try:
+            yield was_free
+        finally:
+            # A broken connection is discarded by connection(), which
+            # ends the session and releases the lock with it
+            cur.execute("SELECT pg_advisory_unlock(%s)", (key,))
+            conn.commit()
@@ -3,25 +3,17 @@
 # QUICK DIAGNOSTIC CHECK FOR TIMETABLE GENERATION
 # =====================================================
 
-import psycopg2
 import os
 from dotenv import load_dotenv
 from collections import defaultdict
+from db import connection
+from timetable_writer import ACTIVE_VERSION_SQL
+from data_source import get_data_source, DatabaseSource
 
 # Load environment variables from .env file
 load_dotenv()
 
-def get_connection():
-    """Establish Supabase database connection using environment variables"""
-    return psycopg2.connect(
-        host=os.getenv("SUPABASE_DB_HOST"),
-        port=os.getenv("SUPABASE_DB_PORT", "5432"),
-        database=os.getenv("SUPABASE_DB_NAME"),
-        user=os.getenv("SUPABASE_DB_USER"),
-        password=os.getenv("SUPABASE_DB_PASSWORD")
-    )
-
-def check_database_state():
+def check_database_state(data_dir=None):
     """
     Run comprehensive diagnostics on database state
     Identifies potential issues before generation
@@ -31,24 +23,27 @@ def check_database_state():
     print("TIMETABLE GENERATION - DATABASE DIAGNOSTICS")
     print("=" * 80)
     
-    conn = get_connection()
-    cur = conn.cursor()
+    # Solver input comes from fixtures, or from the snapshot
+    # when the DB is unchanged
+    source = get_data_source(data_dir)
+    offline = not isinstance(source, DatabaseSource)
+    data = source.load()
+
+    theory_by_teacher = defaultdict(int)
+    practical_by_teacher = defaultdict(int)
+    for t, _, _, theory, practical in data["weekly_loads"]:
+        theory_by_teacher[t] += theory or 0
+        practical_by_teacher[t] += practical or 0
     
     # =====================================================
     # 1. TEACHER DAILY LIMITS
     # =====================================================
     print("\n📊 TEACHER DAILY LIMITS")
     print("-" * 80)
-    cur.execute("""
-        SELECT 
-            teacher_id,
-            teacher_name,
-            max_lectures_per_day
-        FROM teachers
-        ORDER BY max_lectures_per_day, teacher_id
-    """)
-    
-    limits = cur.fetchall()
+    limits = sorted(
+        ((t[0], t[1], t[2]) for t in data["teachers"]),
+        key=lambda t: (t[2], t[0])
+    )
     limit_distribution = defaultdict(int)
     
     for teacher_id, name, limit in limits:
@@ -65,21 +60,17 @@ def check_database_state():
     # =====================================================
     print("\n📚 TEACHER WEEKLY WORKLOAD")
     print("-" * 80)
-    cur.execute("""
-        SELECT 
-            t.teacher_id,
-            t.teacher_name,
-            COALESCE(SUM(twl.weekly_theory_load), 0) as total_theory,
-            COALESCE(SUM(twl.weekly_practical_load), 0) as total_practical,
-            COALESCE(SUM(twl.weekly_theory_load), 0) + 
-            COALESCE(SUM(twl.weekly_practical_load), 0) as total_hours
-        FROM teachers t
-        LEFT JOIN teacher_weekly_load twl ON twl.teacher_id = t.teacher_id
-        GROUP BY t.teacher_id, t.teacher_name
-        ORDER BY total_hours DESC
-    """)
-    
-    workloads = cur.fetchall()
+    workloads = [
+        (
+            t[0],
+            t[1],
+            theory_by_teacher[t[0]],
+            practical_by_teacher[t[0]],
+            theory_by_teacher[t[0]] + practical_by_teacher[t[0]]
+        )
+        for t in data["teachers"]
+    ]
+    workloads.sort(key=lambda w: w[4], reverse=True)
     
     print("Top 10 Teachers by Workload:")
     for i, (teacher_id, name, theory, practical, total) in enumerate(workloads[:10], 1):
@@ -98,21 +89,24 @@ def check_database_state():
     # =====================================================
     print("\n🎓 SUBJECT ALLOCATIONS")
     print("-" * 80)
-    cur.execute("""
-        SELECT 
-            s.subject_id,
-            s.subject_name,
-            s.is_lab,
-            COUNT(DISTINCT tsa.teacher_id) as theory_teachers,
-            COUNT(DISTINCT tbsa.teacher_id) as lab_teachers
-        FROM subjects s
-        LEFT JOIN teacher_subject_allocation tsa ON tsa.subject_id = s.subject_id
-        LEFT JOIN teacher_batch_subject_allocation tbsa ON tbsa.subject_id = s.subject_id
-        GROUP BY s.subject_id, s.subject_name, s.is_lab
-        ORDER BY s.subject_name
-    """)
-    
-    allocations = cur.fetchall()
+    theory_teachers_by_subject = defaultdict(set)
+    for t, s, _ in data["allocations"]:
+        theory_teachers_by_subject[s].add(t)
+
+    lab_teachers_by_subject = defaultdict(set)
+    for t, s, _, _ in data["batch_allocations"]:
+        lab_teachers_by_subject[s].add(t)
+
+    allocations = [
+        (
+            subj_id,
+            name,
+            is_lab,
+            len(theory_teachers_by_subject[subj_id]),
+            len(lab_teachers_by_subject[subj_id])
+        )
+        for subj_id, name, is_lab in data["subjects"]
+    ]
     
     issues = []
     for subj_id, name, is_lab, theory_teachers, lab_teachers in allocations:
@@ -133,76 +127,25 @@ def check_database_state():
     # =====================================================
     print("\n🏫 CLASS CONFIGURATION")
     print("-" * 80)
-    cur.execute("""
-        SELECT 
-            c.class_id,
-            c.class_name,
-            COUNT(DISTINCT cb.batch_id) as num_batches
-        FROM classes c
-        LEFT JOIN class_batches cb ON cb.class_id = c.class_id
-        GROUP BY c.class_id, c.class_name
-        ORDER BY c.class_name
-    """)
-    
-    classes = cur.fetchall()
+    batches_by_class = defaultdict(int)
+    for _, class_id, _ in data["batches"]:
+        batches_by_class[class_id] += 1
+
+    classes = [
+        (class_id, name, batches_by_class[class_id])
+        for class_id, name in data["classes"]
+    ]
     for class_id, name, batches in classes:
         print(f"  {name}: {batches} batches")
     
     # =====================================================
-    # 5. WEEKLY LOAD CONFIGURATION
-    # =====================================================
-    print("\n⏰ WEEKLY LOAD REQUIREMENTS")
-    print("-" * 80)
-    cur.execute("""
-        SELECT 
-            slc.weekly_theory_load,
-            slc.weekly_practical_load
-        FROM subject_load_config slc
-    """)
-    
-    loads = cur.fetchall()
-    
-    total_theory = sum(l[0] for l in loads)
-    total_practical = sum(l[1] for l in loads)
-    
-    print(f"Total weekly theory hours required: {total_theory}")
-    print(f"Total weekly practical hours required: {total_practical}")
-    print(f"Total weekly hours required: {total_theory + total_practical}")
-    
-    # =====================================================
-    # 6. CURRENT TIMETABLE STATE
+    # 5 + 6. DATABASE-ONLY SECTIONS
     # =====================================================
-    print("\n📅 CURRENT TIMETABLE STATE")
-    print("-" * 80)
-    cur.execute("""
-        SELECT 
-            day,
-            COUNT(*) as entries
-        FROM timetable
-        GROUP BY day
-        ORDER BY 
-            CASE day
-                WHEN 'Mon' THEN 1
-                WHEN 'Tue' THEN 2
-                WHEN 'Wed' THEN 3
-                WHEN 'Thu' THEN 4
-                WHEN 'Fri' THEN 5
-            END
-    """)
-    
-    timetable_state = cur.fetchall()
-    
-    if not timetable_state:
-        print("  No timetable entries found")
+    days_with_entries = set()
+    if offline:
+        print("\n⏭️  Skipping load config / timetable state (offline mode)")
     else:
-        for day, count in timetable_state:
-            print(f"  {day}: {count} entries")
-        
-        # Check if only Mon/Tue have entries
-        days_with_entries = {day for day, count in timetable_state if count > 0}
-        if days_with_entries <= {'Mon', 'Tue'}:
-            print("\n⚠️  WARNING: Only Monday and Tuesday have entries!")
-            print("  This suggests the generator is failing to place entries for later days.")
+        days_with_entries = check_timetable_tables()
     
     # =====================================================
     # 7. POTENTIAL BOTTLENECKS
@@ -211,20 +154,12 @@ def check_database_state():
     print("-" * 80)
     
     # Check teachers with high load but low daily limit
-    cur.execute("""
-        SELECT 
-            t.teacher_id,
-            t.teacher_name,
-            t.max_lectures_per_day,
-            COALESCE(SUM(twl.weekly_theory_load), 0) as weekly_theory
-        FROM teachers t
-        LEFT JOIN teacher_weekly_load twl ON twl.teacher_id = t.teacher_id
-        GROUP BY t.teacher_id, t.teacher_name, t.max_lectures_per_day
-        HAVING COALESCE(SUM(twl.weekly_theory_load), 0) > t.max_lectures_per_day * 2
-        ORDER BY weekly_theory DESC
-    """)
-    
-    bottlenecks = cur.fetchall()
+    bottlenecks = [
+        (t[0], t[1], t[2], theory_by_teacher[t[0]])
+        for t in data["teachers"]
+        if t[2] is not None and theory_by_teacher[t[0]] > t[2] * 2
+    ]
+    bottlenecks.sort(key=lambda b: b[3], reverse=True)
     
     if bottlenecks:
         print("Teachers with high weekly load but low daily limit:")
@@ -266,9 +201,76 @@ def check_database_state():
         print(f"\n⚠️  {warnings} potential issues detected - review above for details")
     
     print("=" * 80)
-    
-    cur.close()
-    conn.close()
+
+
+def check_timetable_tables():
+    """
+    Sections that read tables outside the solver input.
+    Returns the set of days that have timetable entries.
+    """
+    with connection() as conn, conn.cursor() as cur:
+        days_with_entries = set()
+
+        # =====================================================
+        # 5. WEEKLY LOAD CONFIGURATION
+        # =====================================================
+        print("\n⏰ WEEKLY LOAD REQUIREMENTS")
+        print("-" * 80)
+        cur.execute("""
+            SELECT 
+                slc.weekly_theory_load,
+                slc.weekly_practical_load
+            FROM subject_load_config slc
+        """)
+
+        loads = cur.fetchall()
+
+        total_theory = sum(l[0] for l in loads)
+        total_practical = sum(l[1] for l in loads)
+
+        print(f"Total weekly theory hours required: {total_theory}")
+        print(f"Total weekly practical hours required: {total_practical}")
+        print(f"Total weekly hours required: {total_theory + total_practical}")
+
+        # =====================================================
+        # 6. CURRENT TIMETABLE STATE
+        # =====================================================
+        print("\n📅 CURRENT TIMETABLE STATE")
+        print("-" * 80)
+        cur.execute(f"""
+            SELECT 
+                day,
+                COUNT(*) as entries
+            FROM timetable
+            WHERE timetable_version = {ACTIVE_VERSION_SQL}
+            GROUP BY day_idx, day
+            ORDER BY day_idx
+        """)
+
+        timetable_state = cur.fetchall()
+
+        if not timetable_state:
+            print("  No timetable entries found")
+        else:
+            for day, count in timetable_state:
+                print(f"  {day}: {count} entries")
+
+            # Check if only Mon/Tue have entries
+            days_with_entries = {day for day, count in timetable_state if count > 0}
+            if days_with_entries <= {'Mon', 'Tue'}:
+                print("\n⚠️  WARNING: Only Monday and Tuesday have entries!")
+                print("  This suggests the generator is failing to place entries for later days.")
+    return days_with_entries
+
 
 if __name__ == "__main__":
-    check_database_state()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Timetable input diagnostics")
+    parser.add_argument(
+        "--data-dir",
+        help="directory of CSV/JSON fixtures (offline mode, no database)"
+    )
+    args = parser.parse_args()
+
+    check_database_state(args.data_dir)
\ No newline at end of file
@@ -6,8 +6,6 @@
 # - Batch-level practicals
 # =====================================================
 
-from db import get_connection
-
 
 # -------------------------------
 # CLASSES
@@ -26,11 +24,9 @@ def fetch_classes(cursor):
 # -------------------------------
 def fetch_subjects(cursor):
     cursor.execute("""
-        SELECT subject_id, subject_name,
-               lectures_per_week,
-               is_lab,
-               practicals_per_week
+        SELECT subject_id, subject_name, is_lab
         FROM subjects
+        ORDER BY subject_name
     """)
     return cursor.fetchall()
 
@@ -101,7 +97,7 @@ def fetch_batch_allocations(cursor):
 # -------------------------------
 def load_all_data(cursor):
     """
-    Master loader used by main.py
+    Master loader for the raw source tables
     """
     return {
         "classes": fetch_classes(cursor),
@@ -112,3 +108,30 @@ def load_all_data(cursor):
         "batches": fetch_batches(cursor),
         "batch_allocations": fetch_batch_allocations(cursor)
     }
+
+
+# -------------------------------
+# SOLVER INPUT
+# -------------------------------
+def load_solver_input(cursor):
+    """
+    Raw tables plus the lookup maps generate_timetable()
+    and validate_timetable() expect
+    """
+    return add_lookup_maps(load_all_data(cursor))
+
+
+def add_lookup_maps(data):
+    """
+    Derives the solver lookups from the raw table rows.
+    Shared by every input source (DB, fixtures, synthetic).
+    """
+    data["class_map"] = dict(data["classes"])
+    data["teacher_limits"] = {
+        t[0]: t[2]   # teacher_id → max_lectures_per_day
+        for t in data["teachers"]
+    }
+    data["allocation_set"] = set(data["allocations"])
+    data["batch_allocation_set"] = set(data["batch_allocations"])
+
+    return data
@@ -2,7 +2,11 @@ from collections import defaultdict
 
 DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
 
-def fitness(timetable, slot_day_map, slot_type_map, subject_type_map):
+def fitness(timetable, slot_day_map=None, slot_type_map=None, subject_type_map=None):
+    """
+    Scores a generator timetable (entries carry day + slot_id).
+    slot_day_map is only needed for legacy entries without a day.
+    """
     score = 1000
 
     # ---------------------------------------
@@ -11,10 +15,11 @@ def fitness(timetable, slot_day_map, slot_type_map, subject_type_map):
     teacher_day_slot = set()
 
     for entry in timetable:
+        slot = entry.get("slot_id") or entry.get("slot")
         key = (
             entry["teacher_id"],
-            slot_day_map[entry["slot"]],
-            entry["slot"]
+            entry.get("day") or slot_day_map[slot],
+            slot
         )
 
         if key in teacher_day_slot:
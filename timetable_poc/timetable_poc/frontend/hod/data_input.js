@@ -113,6 +113,7 @@ function loadAllocationTable() {
 
       subjects.forEach(s => {
         const row = document.createElement("tr");
+        row.dataset.subjectId = s.subject_id;
 
         row.innerHTML = `
           <td>${s.subject_name}</td>
@@ -207,3 +208,37 @@ function saveAllocation(btn, subjectId) {
     .then(d => alert(d.message || "Saved"))
     .catch(() => alert("Failed"));
 }
+
+// ================= SAVE ALL DIVISION ALLOCATIONS =================
+// One request for every row with a teacher selected
+function saveAllAllocations() {
+  const allocations = [];
+
+  document.querySelectorAll("#allocationTable tr[data-subject-id]").forEach(row => {
+    const teacherId = row.querySelector(".teacherSelect").value;
+    const classId = row.querySelector(".divisionSelect").value;
+    if (!teacherId || !classId) return;
+
+    allocations.push({
+      teacher_id: Number(teacherId),
+      subject_id: Number(row.dataset.subjectId),
+      class_id: Number(classId)
+    });
+  });
+
+  if (!allocations.length) {
+    alert("Select at least one teacher");
+    return;
+  }
+
+  fetch("/api/hod/division-allocation/bulk", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ allocations })
+  })
+    .then(res => res.json())
+    .then(d => alert(
+      d.error || `${d.message} (${d.inserted} new, ${d.skipped} already allocated)`
+    ))
+    .catch(() => alert("Failed"));
+}
@@ -1,75 +1,108 @@
+import copy
 import random
 from generator import generate_timetable
 from fitness import fitness
-from fetch_data import fetch_slot_maps, fetch_subject_type_map
 
 POPULATION_SIZE = 30
 GENERATIONS = 50
 MUTATION_RATE = 0.2
 
 
-def optimize():
-    # ✅ FETCH REQUIRED MAPS
-    slot_day_map, slot_type_map, slot_order_map = fetch_slot_maps()
-    subject_type_map = fetch_subject_type_map()
-
+def optimize(data, generations=GENERATIONS, population_size=POPULATION_SIZE,
+             base=None, progress=None):
+    """
+    Evolves the generator's timetable for the given solver input
+    (database or fixture source, see data_source.py).
+    Pass `base` to start from an already generated timetable, and
+    `progress(**fields)` to hear each generation's best fitness.
+    """
     # ✅ INITIAL POPULATION
+    # The generator is deterministic, so seed from one run
+    if base is None:
+        base = generate_timetable(data)
     population = [
-        generate_timetable()
-        for _ in range(POPULATION_SIZE)
+        mutate(base)
+        for _ in range(population_size)
     ]
 
-    for generation in range(GENERATIONS):
-        scored_population = []
+    for generation in range(generations):
+        scored_population, population = run_generation(
+            population,
+            population_size
+        )
 
-        for timetable in population:
-            score = fitness(
-                timetable,
-                slot_day_map,
-                slot_type_map,
-                subject_type_map
+        print(f"Generation {generation} | Best fitness: {scored_population[0][0]}")
+        if progress:
+            progress(
+                phase="optimize",
+                generation=generation + 1,
+                generations=generations,
+                best_fitness=scored_population[0][0]
             )
-            scored_population.append((score, timetable))
 
-        # Sort by fitness (descending)
-        scored_population.sort(reverse=True, key=lambda x: x[0])
+    # Return best timetable
+    return scored_population[0][1]
+
 
-        print(f"Generation {generation} | Best fitness: {scored_population[0][0]}")
+def run_generation(population, population_size=POPULATION_SIZE):
+    """
+    Scores one generation and breeds the next.
+    Returns (scored_population, new_population).
+    """
+    scored_population = []
 
-        # Selection (top 30%)
-        survivors = [
-            tt for _, tt in scored_population[:POPULATION_SIZE // 3]
-        ]
+    for timetable in population:
+        score = fitness(timetable)
+        scored_population.append((score, timetable))
 
-        # Reproduction
-        new_population = survivors.copy()
+    # Sort by fitness (descending)
+    scored_population.sort(reverse=True, key=lambda x: x[0])
 
-        while len(new_population) < POPULATION_SIZE:
-            parent = random.choice(survivors)
-            child = mutate(parent, slot_type_map)
-            new_population.append(child)
+    # Selection (top 30%)
+    survivors = [
+        tt for _, tt in scored_population[:population_size // 3]
+    ]
 
-        population = new_population
+    # Reproduction
+    new_population = survivors.copy()
 
-    # Return best timetable
-    return scored_population[0][1]
+    while len(new_population) < population_size:
+        parent = random.choice(survivors)
+        child = mutate(parent)
+        new_population.append(child)
 
+    return scored_population, new_population
 
-def mutate(timetable, slot_type_map):
+
+def mutate(timetable):
+    """
+    Swaps the (day, slot) of two entries of the SAME class and kind,
+    so a class keeps the slots it had: lectures can't clash or leave
+    the class's slot pattern. Broken lab windows fail validation.
+    """
     new_tt = timetable.copy()
 
-    if random.random() > MUTATION_RATE:
+    if random.random() > MUTATION_RATE or len(new_tt) < 2:
         return new_tt
 
-    i, j = random.sample(range(len(new_tt)), 2)
+    i = random.randrange(len(new_tt))
 
-    # ❗ DO NOT MIX LAB & LECTURE SLOTS
-    if slot_type_map[new_tt[i]["slot_id"]] != slot_type_map[new_tt[j]["slot_id"]]:
+    # ❗ DO NOT MIX CLASSES OR LAB & LECTURE SLOTS
+    partners = [
+        k for k, e in enumerate(new_tt)
+        if k != i
+        and e["class_id"] == new_tt[i]["class_id"]
+        and e["is_lab"] == new_tt[i]["is_lab"]
+    ]
+    if not partners:
         return new_tt
+    j = random.choice(partners)
+
+    # Copy the two entries so parents stay untouched
+    new_tt[i] = copy.copy(new_tt[i])
+    new_tt[j] = copy.copy(new_tt[j])
 
-    new_tt[i]["slot_id"], new_tt[j]["slot_id"] = (
-        new_tt[j]["slot_id"],
-        new_tt[i]["slot_id"],
-    )
+    for key in ("day", "slot_id"):
+        new_tt[i][key], new_tt[j][key] = new_tt[j][key], new_tt[i][key]
 
     return new_tt
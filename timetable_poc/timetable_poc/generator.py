@@ -6,6 +6,8 @@
 
 from slot_maps import get_lab_slot_groups, get_lecture_slots
 from collections import defaultdict
+from instrumentation import new_counters, new_stats, finish_stats, timed
+import time
 
 DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri"]
 
@@ -43,12 +45,17 @@ def infer_lab_window(slot):
 # -----------------------------------------------------
 # PHASE 1: GLOBAL LAB SCHEDULING
 # -----------------------------------------------------
-def generate_all_labs(data, global_teacher_busy):
+def generate_all_labs(data, global_teacher_busy, counters=None):
     """
     Generate ALL lab sessions globally before any lectures.
     Ensures no teacher-subject-class has multiple lab sessions on same day.
+    Candidate / rejection counts go into `counters` (see instrumentation).
     """
     timetable = []
+    if counters is None:
+        counters = new_counters()
+    rejections = counters["rejections"]
+    candidates = 0
 
     weekly_load = build_weekly_load_map(data["weekly_loads"])
     batch_allocs = build_batch_allocations(data["batch_allocations"])
@@ -96,6 +103,8 @@ def generate_all_labs(data, global_teacher_busy):
 
         for window in lab_windows:
             for day in DAYS:
+                candidates += 1
+
                 # ❌ SAME TEACHER–SUBJECT–CLASS SAME DAY NOT ALLOWED
                 day_key = (
                     lab["teacher"],
@@ -104,6 +113,7 @@ def generate_all_labs(data, global_teacher_busy):
                     day
                 )
                 if day_key in used_lab_days:
+                    rejections["same_day_lab"] += 1
                     continue
 
                 # Teacher must be free in both slots
@@ -111,12 +121,14 @@ def generate_all_labs(data, global_teacher_busy):
                     lab["teacher"] in global_teacher_busy.get((day, slot), set())
                     for slot in window
                 ):
+                    rejections["teacher_busy"] += 1
                     continue
 
                 # Parallel batch subject safety
                 # Same subject cannot run in parallel windows for same class
                 key = (day, lab["class_id"], window)
                 if lab["subject"] in parallel_subjects[key]:
+                    rejections["parallel_subject"] += 1
                     continue
 
                 # ✅ PLACE LAB
@@ -135,6 +147,7 @@ def generate_all_labs(data, global_teacher_busy):
 
                 parallel_subjects[key].add(lab["subject"])
                 used_lab_days.add(day_key)
+                counters["placed"] += 1
 
                 placed = True
                 break
@@ -143,11 +156,13 @@ def generate_all_labs(data, global_teacher_busy):
                 break
 
         if not placed:
+            counters["candidates"] += candidates
             raise Exception(
                 f"❌ Global lab placement failed:\n"
                 f"Teacher {lab['teacher']}, Subject {lab['subject']}, Class {class_name}"
             )
 
+    counters["candidates"] += candidates
     return timetable
 
 
@@ -159,13 +174,19 @@ def generate_class_lectures(
     class_name,
     data,
     global_teacher_busy,
-    teacher_daily_lectures
+    teacher_daily_lectures,
+    counters=None
 ):
     """
     Generate lectures for a single class.
     Spreads lectures across the week (max 1 per day per subject by default).
+    Candidate / rejection counts go into `counters` (see instrumentation).
     """
     timetable = []
+    if counters is None:
+        counters = new_counters()
+    rejections = counters["rejections"]
+    candidates = 0
 
     weekly_load = build_weekly_load_map(data["weekly_loads"])
     lecture_slots = get_lecture_slots(class_name)
@@ -206,10 +227,14 @@ def generate_class_lectures(
                     if placed >= needed:
                         break
 
+                    candidates += 1
+
                     # Spreading rule: Pass 1 = max 1/day, Pass 2 = max 2/day
                     if pass_num == 1 and subject_day_count[day] >= 1:
+                        rejections["spread_limit"] += 1
                         continue
                     if pass_num == 2 and subject_day_count[day] >= 2:
+                        rejections["spread_limit"] += 1
                         continue
 
                     # Slot already used by this class?
@@ -217,6 +242,7 @@ def generate_class_lectures(
                         e["day"] == day and e.get("slot_id") == slot
                         for e in timetable
                     ):
+                        rejections["class_slot_taken"] += 1
                         continue
 
                     # Check if teacher has lab in this slot's window
@@ -225,16 +251,19 @@ def generate_class_lectures(
                         t in global_teacher_busy.get((day, s2), set())
                         for s2 in window
                     ):
+                        rejections["teacher_busy"] += 1
                         continue
 
                     # Teacher busy in this exact slot?
                     if t in global_teacher_busy.get((day, slot), set()):
+                        rejections["teacher_busy"] += 1
                         continue
 
                     # Daily lecture limit for teacher
                     teacher_limits = data.get("teacher_limits", {})
                     max_daily = teacher_limits.get(t)
                     if max_daily and teacher_daily_lectures[t][day] >= max_daily:
+                        rejections["daily_limit"] += 1
                         continue
 
                     # ✅ PLACE LECTURE
@@ -257,51 +286,88 @@ def generate_class_lectures(
                 if placed >= needed:
                     break
             if placed >= needed:
+                counters["passes_used"][pass_num] += 1
                 break
 
+        counters["placed"] += placed
+
         if placed < needed:
+            counters["candidates"] += candidates
             raise Exception(
                 f"❌ Lecture placement stuck for {class_name}, subject {s}\n"
                 f"Placed {placed}/{needed} lectures"
             )
 
+    counters["candidates"] += candidates
     return timetable
 
 
 # -----------------------------------------------------
 # MAIN GENERATION FUNCTION
 # -----------------------------------------------------
-def generate_timetable(data):
+def generate_timetable(data, stats=None, progress=None):
     """
     Main entry point for timetable generation.
     Returns list of timetable entries.
+    Pass a dict from instrumentation.new_stats() as `stats` to get
+    per-phase timings and per-class placement counters back.
+    `progress(**fields)` is called as phases start and classes finish.
     """
+    if stats is None:
+        stats = new_stats()
+    if progress is None:
+        progress = lambda **fields: None
+
     global_teacher_busy = {}
     teacher_daily_lectures = defaultdict(lambda: defaultdict(int))
 
     timetable = []
 
-    # PHASE 1: Generate all labs first
-    print("🔬 Generating labs...")
-    lab_entries = generate_all_labs(data, global_teacher_busy)
-    timetable.extend(lab_entries)
-    print(f"✅ Generated {len(lab_entries)} lab entries")
-
-    # PHASE 2: Generate lectures for each class
-    print("📚 Generating lectures...")
-    class_map = data["class_map"]
-
-    for class_id, class_name in sorted(class_map.items(), key=lambda x: x[1]):
-        print(f"  Processing {class_name}...")
-        lecture_entries = generate_class_lectures(
-            class_id,
-            class_name,
-            data,
-            global_teacher_busy,
-            teacher_daily_lectures
+    try:
+        # PHASE 1: Generate all labs first
+        print("🔬 Generating labs...")
+        progress(phase="labs")
+        with timed(stats, "labs"):
+            lab_entries = generate_all_labs(data, global_teacher_busy, stats["labs"])
+        stats["labs"]["seconds"] = stats["phases"]["labs"]
+        timetable.extend(lab_entries)
+        print(f"✅ Generated {len(lab_entries)} lab entries")
+
+        # PHASE 2: Generate lectures for each class
+        print("📚 Generating lectures...")
+        class_map = data["class_map"]
+        progress(
+            phase="lectures",
+            classes_done=0,
+            classes_total=len(class_map),
+            entries=len(timetable)
         )
-        timetable.extend(lecture_entries)
+
+        with timed(stats, "lectures"):
+            for done, (class_id, class_name) in enumerate(
+                sorted(class_map.items(), key=lambda x: x[1]), start=1
+            ):
+                print(f"  Processing {class_name}...")
+                counters = stats["classes"].setdefault(class_name, new_counters())
+                start = time.perf_counter()
+                try:
+                    lecture_entries = generate_class_lectures(
+                        class_id,
+                        class_name,
+                        data,
+                        global_teacher_busy,
+                        teacher_daily_lectures,
+                        counters
+                    )
+                finally:
+                    counters["seconds"] = time.perf_counter() - start
+                timetable.extend(lecture_entries)
+                progress(classes_done=done, entries=len(timetable))
+    finally:
+        # Totals are filled in even when placement gets stuck,
+        # so a failed run still shows where it spent its time
+        finish_stats(stats)
 
     print(f"✅ Total entries generated: {len(timetable)}")
 
-    return timetable
\ No newline at end of file
+    return timetable
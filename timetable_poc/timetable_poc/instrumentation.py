@@ -0,0 +1,99 @@
+# instrumentation.py
+# =====================================================
+# GENERATION STATS
+# Phase timers + placement counters filled in by
+# generate_timetable() and its callers
+# =====================================================
+
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Append one JSON line per generation run when set
+STATS_FILE_ENV = "GENERATION_STATS_FILE"
+
+
+def new_stats():
+    """Empty stats dict (JSON-serialisable once finished)"""
+    return {
+        "phases": {},            # phase → seconds
+        "labs": new_counters(),
+        "classes": {},           # class_name → counters + seconds
+        "totals": new_counters(),
+    }
+
+
+def new_counters():
+    return {
+        "candidates": 0,                     # candidate slots tried
+        "rejections": defaultdict(int),      # reason → count
+        "passes_used": defaultdict(int),     # pass number → tasks finished in it
+        "placed": 0,
+        "seconds": 0.0,
+    }
+
+
+@contextmanager
+def timed(stats, phase):
+    """Adds the block's wall time to stats["phases"][phase]"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats["phases"][phase] = (
+                stats["phases"].get(phase, 0.0) + time.perf_counter() - start
+            )
+
+
+def merge_counters(into, counters):
+    into["candidates"] += counters["candidates"]
+    into["placed"] += counters["placed"]
+    into["seconds"] += counters["seconds"]
+    for reason, n in counters["rejections"].items():
+        into["rejections"][reason] += n
+    for p, n in counters["passes_used"].items():
+        into["passes_used"][p] += n
+
+
+def finish_stats(stats):
+    """Rolls labs + per-class counters into stats["totals"]"""
+    totals = new_counters()
+    merge_counters(totals, stats["labs"])
+    for counters in stats["classes"].values():
+        merge_counters(totals, counters)
+    stats["totals"] = totals
+    return stats
+
+
+def summarize(stats):
+    """One-line-per-fact text summary for logs"""
+    lines = []
+    for phase, seconds in stats["phases"].items():
+        lines.append(f"  ⏱️  {phase}: {seconds:.3f}s")
+
+    if stats["classes"]:
+        slowest = max(stats["classes"].items(), key=lambda kv: kv[1]["seconds"])
+        lines.append(
+            f"  🐢 Slowest class: {slowest[0]} "
+            f"({slowest[1]['seconds']:.3f}s, {slowest[1]['candidates']} candidates)"
+        )
+
+    rejections = stats["totals"]["rejections"]
+    if rejections:
+        reason, n = max(rejections.items(), key=lambda kv: kv[1])
+        lines.append(f"  🚫 Top rejection: {reason} ({n})")
+
+    return "\n".join(lines)
+
+
+def export_stats(stats, path=None):
+    """Appends the stats as one JSON line to path / $GENERATION_STATS_FILE"""
+    path = path or os.getenv(STATS_FILE_ENV)
+    if not path:
+        return
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(dict(stats, recorded_at=time.time())) + "\n")
@@ -0,0 +1,181 @@
+# jobs.py
+# =====================================================
+# BACKGROUND JOB RUNNER
+# In-process worker pool so long tasks (timetable generation)
+# outlive the HTTP request that submitted them.
+# =====================================================
+
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+# Finished jobs are forgotten after this long
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+_jobs = {}
+_lock = threading.Lock()
+_changed = threading.Condition(_lock)   # notified on every job update
+_inflight = {}                          # single-flight key → unfinished job_id
+
+
+class JobFailed(Exception):
+    """Raise from a job to fail it while still attaching a result"""
+
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
+
+
+def _new_job(kind):
+    return {
+        "job_id": uuid.uuid4().hex,
+        "kind": kind,
+        "status": "queued",       # queued → running → succeeded / failed
+        "seq": 0,                 # bumped on every change (SSE event id)
+        "phase": None,
+        "progress": {},
+        "result": None,
+        "error": None,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+    }
+
+
+def _prune():
+    cutoff = time.time() - JOB_RETENTION_SECONDS
+    for job_id, job in list(_jobs.items()):
+        if job["finished_at"] and job["finished_at"] < cutoff:
+            del _jobs[job_id]
+
+
+def _touch(job):
+    """Caller holds _lock"""
+    job["seq"] += 1
+    _changed.notify_all()
+
+
+def _update(job_id, **fields):
+    with _lock:
+        job = _jobs.get(job_id)
+        if job:
+            job.update(fields)
+            _touch(job)
+
+
+def report(job_id, phase=None, **progress):
+    """Records the current phase and merges progress counters"""
+    with _lock:
+        job = _jobs.get(job_id)
+        if not job:
+            return
+        if phase is not None:
+            job["phase"] = phase
+        job["progress"].update(progress)
+        _touch(job)
+
+
+def _start(job, fn, args, kwargs, key=None):
+    """Runs fn on the pool for an already registered job"""
+    job_id = job["job_id"]
+    kind = job["kind"]
+
+    def job_report(phase=None, **progress):
+        report(job_id, phase, **progress)
+
+    def run():
+        _update(job_id, status="running", started_at=time.time())
+        try:
+            result = fn(job_report, *args, **kwargs)
+            _update(job_id, status="succeeded", result=result, finished_at=time.time())
+        except JobFailed as e:
+            _update(job_id, status="failed", error=str(e), result=e.result, finished_at=time.time())
+        except Exception as e:
+            print(f"❌ JOB {kind} {job_id} FAILED:", e)
+            traceback.print_exc()
+            _update(job_id, status="failed", error=str(e), finished_at=time.time())
+        finally:
+            if key is not None:
+                with _lock:
+                    if _inflight.get(key) == job_id:
+                        del _inflight[key]
+
+    _executor.submit(run)
+    return job_id
+
+
+def submit(kind, fn, *args, **kwargs):
+    """
+    Queues fn(report, *args, **kwargs) on the worker pool.
+    `report(phase=None, **progress)` updates the job as it runs;
+    fn's return value becomes the job result.
+    Returns the job id.
+    """
+    job = _new_job(kind)
+
+    with _lock:
+        _prune()
+        _jobs[job["job_id"]] = job
+
+    return _start(job, fn, args, kwargs)
+
+
+def submit_once(key, kind, fn, *args, **kwargs):
+    """
+    Single-flight submit: while a job submitted under `key` is still
+    queued or running, its id is returned instead of starting another.
+    Returns (job_id, attached).
+    """
+    with _lock:
+        job_id = _inflight.get(key)
+        if job_id in _jobs and not is_finished(_jobs[job_id]):
+            return job_id, True
+
+        _prune()
+        job = _new_job(kind)
+        _jobs[job["job_id"]] = job
+        _inflight[key] = job["job_id"]
+
+    return _start(job, fn, args, kwargs, key), False
+
+
+def is_finished(job):
+    return job["status"] in ("succeeded", "failed")
+
+
+def _snapshot(job):
+    """Caller holds _lock"""
+    snapshot = dict(job, progress=dict(job["progress"]))
+    if snapshot["started_at"]:
+        end = snapshot["finished_at"] or time.time()
+        snapshot["elapsed_s"] = round(end - snapshot["started_at"], 3)
+    return snapshot
+
+
+def get_job(job_id):
+    """Snapshot of a job (safe to serialise), or None"""
+    with _lock:
+        job = _jobs.get(job_id)
+        return _snapshot(job) if job else None
+
+
+def wait_for_change(job_id, seq, timeout):
+    """
+    Blocks until the job moves past `seq`, finishes or `timeout`
+    seconds pass. Returns the latest snapshot (or None if unknown).
+    """
+    with _changed:
+        _changed.wait_for(
+            lambda: job_id not in _jobs
+            or _jobs[job_id]["seq"] > seq
+            or is_finished(_jobs[job_id]),
+            timeout
+        )
+        job = _jobs.get(job_id)
+        return _snapshot(job) if job else None
@@ -3,117 +3,34 @@
 # ENTRY POINT – COMPLETE TIMETABLE GENERATION WITH VALIDATION
 # =====================================================
 
-import psycopg2
 import os
+import json
 from dotenv import load_dotenv
 from generator import generate_timetable
+from timetable_writer import save_timetable
 from constraints import validate_timetable
+from data_source import get_data_source, DatabaseSource
+from instrumentation import new_stats, timed, summarize, export_stats
 
 # Load environment variables from .env file
 load_dotenv()
 
 
-def get_connection():
-    """Establish Supabase database connection using environment variables"""
-    return psycopg2.connect(
-        host=os.getenv("SUPABASE_DB_HOST"),
-        port=os.getenv("SUPABASE_DB_PORT", "5432"),
-        database=os.getenv("SUPABASE_DB_NAME"),
-        user=os.getenv("SUPABASE_DB_USER"),
-        password=os.getenv("SUPABASE_DB_PASSWORD")
-    )
-
-
-def load_all_data(cursor):
-    """Load all necessary data from database"""
-    
-    # Weekly loads
-    cursor.execute("""
-        SELECT teacher_id, subject_id, class_id,
-               weekly_theory_load, weekly_practical_load
-        FROM teacher_weekly_load
-    """)
-    weekly_loads = cursor.fetchall()
-
-    # Batch allocations
-    cursor.execute("""
-        SELECT teacher_id, subject_id, class_id, batch_id
-        FROM teacher_batch_subject_allocation
-    """)
-    batch_allocations = cursor.fetchall()
-
-    # Classes
-    cursor.execute("""
-        SELECT class_id, class_name
-        FROM classes
-        ORDER BY class_name
-    """)
-    classes = cursor.fetchall()
-    class_map = dict(classes)
-
-    # Teachers with limits
-    cursor.execute("""
-        SELECT teacher_id, teacher_name, max_lectures_per_day
-        FROM teachers
-    """)
-    teachers = cursor.fetchall()
-    teacher_limits = {
-        t_id: max_lec
-        for t_id, _, max_lec in teachers
-    }
-
-    # Subjects
-    cursor.execute("""
-        SELECT subject_id, subject_name
-        FROM subjects
-        ORDER BY subject_name
-    """)
-    subjects = cursor.fetchall()
-
-    # Batches
-    cursor.execute("""
-        SELECT batch_id, batch_name
-        FROM class_batches
-        ORDER BY batch_name
-    """)
-    batches = cursor.fetchall()
-
-    # Theory allocations (teacher-subject-class)
-    cursor.execute("""
-        SELECT teacher_id, subject_id, class_id
-        FROM teacher_subject_allocation
-    """)
-    allocation_set = set(cursor.fetchall())
-
-    # Practical allocations (teacher-subject-class-batch)
-    cursor.execute("""
-        SELECT teacher_id, subject_id, class_id, batch_id
-        FROM teacher_batch_subject_allocation
-    """)
-    batch_allocation_set = set(cursor.fetchall())
-
-    return {
-        "weekly_loads": weekly_loads,
-        "batch_allocations": batch_allocations,
-        "classes": classes,
-        "class_map": class_map,
-        "teachers": teachers,
-        "teacher_limits": teacher_limits,
-        "subjects": subjects,
-        "batches": batches,
-        "allocation_set": allocation_set,
-        "batch_allocation_set": batch_allocation_set
-    }
-
-
-def run_generator():
-    """Main function to generate and save timetable"""
-    
-    conn = get_connection()
-    cur = conn.cursor()
-
-    print("📥 Loading data from database...")
-    data = load_all_data(cur)
+def run_generator(data_dir=None, out_path=None, stats_path=None):
+    """
+    Main function to generate and save timetable.
+    With data_dir the input comes from CSV/JSON fixtures and the
+    result is written to out_path (if given) instead of the database.
+    Phase timings and placement counters are appended to stats_path
+    (or $GENERATION_STATS_FILE) as one JSON line.
+    """
+    source = get_data_source(data_dir)
+    offline = not isinstance(source, DatabaseSource)
+    stats = new_stats()
+
+    print("📥 Loading data...")
+    with timed(stats, "load"):
+        data = source.load()
     print("✅ Data loaded successfully")
 
     # Build weekly load map for validation
@@ -127,67 +44,64 @@ def run_generator():
 
     print("\n🔧 Generating timetable...")
     try:
-        timetable = generate_timetable(data)
+        timetable = generate_timetable(data, stats)
         print(f"✅ Generated {len(timetable)} timetable entries")
     except Exception as e:
         print(f"❌ Generation failed: {e}")
-        cur.close()
-        conn.close()
+        print(summarize(stats))
+        export_stats(dict(stats, error=str(e)), stats_path)
         raise
 
     # Validate before saving
     print("\n🔍 Validating timetable...")
-    is_valid = validate_timetable(
-        timetable,
-        weekly_load_map,
-        data["teacher_limits"],
-        data["allocation_set"],
-        data["batch_allocation_set"]
-    )
+    with timed(stats, "validation"):
+        is_valid = validate_timetable(
+            timetable,
+            weekly_load_map,
+            data["teacher_limits"],
+            data["allocation_set"],
+            data["batch_allocation_set"]
+        )
 
     if not is_valid:
         print("❌ Validation failed - timetable not saved")
-        cur.close()
-        conn.close()
+        export_stats(dict(stats, error="validation failed"), stats_path)
         raise Exception("Timetable validation failed")
 
-    # Save to database
+    with timed(stats, "save"):
+        if offline:
+            if out_path:
+                with open(out_path, "w", encoding="utf-8") as f:
+                    json.dump(timetable, f, indent=2)
+                print(f"\n💾 Saved {len(timetable)} entries to {out_path}")
+        else:
+            save_to_database(timetable)
+
+    print_summary(timetable)
+
+    print("\n⏱️  GENERATION STATS:")
+    print(summarize(stats))
+    export_stats(stats, stats_path)
+
+    print("\n✅ Timetable generation completed successfully!")
+    return timetable
+
+
+def save_to_database(timetable):
+    """Publishes the timetable as the new active version"""
     print("\n💾 Saving timetable to database...")
-    cur.execute("TRUNCATE TABLE timetable")
-
-    # Slot time mapping
-    LOGICAL_SLOT_TIME = {
-        1: ("08:30", "09:30"),
-        2: ("09:30", "10:30"),
-        3: ("10:45", "11:45"),
-        4: ("11:45", "12:45"),
-        5: ("13:30", "14:30"),
-        6: ("14:30", "15:30"),
-    }
+    version_id, churn = save_timetable(timetable, note="main.py")
+    print(f"✅ Saved {len(timetable)} entries to database (version {version_id})")
+    print(
+        f"  🔁 Churn: +{churn['inserted']} ~{churn['updated']} "
+        f"-{churn['deleted']} ={churn['unchanged']}, "
+        f"{len(churn['affected_classes'])} classes / "
+        f"{len(churn['affected_teachers'])} teachers affected"
+    )
+
 
-    for e in timetable:
-        slot_id = e.get("slot_id") or e.get("slot")
-        start_time, end_time = LOGICAL_SLOT_TIME.get(slot_id, ("00:00", "00:00"))
-        
-        cur.execute("""
-            INSERT INTO timetable
-            (class_id, subject_id, teacher_id, batch_id, is_lab, day, start_time, end_time)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            e["class_id"],
-            e["subject_id"],
-            e["teacher_id"],
-            e.get("batch_id"),
-            e["is_lab"],
-            e["day"],
-            start_time,
-            end_time
-        ))
-
-    conn.commit()
-    print(f"✅ Saved {len(timetable)} entries to database")
-
-    # Print summary
+def print_summary(timetable):
+    """Prints entry counts by type and class"""
     print("\n📊 TIMETABLE SUMMARY:")
     print(f"  Total entries: {len(timetable)}")
     
@@ -203,12 +117,23 @@ def run_generator():
     for class_name, count in sorted(class_counts.items()):
         print(f"    {class_name}: {count}")
 
-    cur.close()
-    conn.close()
 
-    print("\n✅ Timetable generation completed successfully!")
-    return timetable
+if __name__ == "__main__":
+    import argparse
 
+    parser = argparse.ArgumentParser(description="Generate the timetable")
+    parser.add_argument(
+        "--data-dir",
+        help="directory of CSV/JSON fixtures (offline mode, no database)"
+    )
+    parser.add_argument(
+        "--out",
+        help="offline mode: write the generated timetable to this JSON file"
+    )
+    parser.add_argument(
+        "--stats-out",
+        help="append phase timings and placement counters (JSON lines)"
+    )
+    args = parser.parse_args()
 
-if __name__ == "__main__":
-    run_generator()
\ No newline at end of file
+    run_generator(args.data_dir, args.out, args.stats_out)
\ No newline at end of file
@@ -0,0 +1,74 @@
+# migrate.py
+# =====================================================
+# SCHEMA MIGRATIONS
+# Applies migrations/NNN_*.sql in order, once each.
+#
+#   python migrate.py           # apply pending
+#   python migrate.py --status  # list applied / pending
+# =====================================================
+
+import os
+
+from db import connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+
+def migration_files():
+    return sorted(
+        f for f in os.listdir(MIGRATIONS_DIR)
+        if f.endswith(".sql") and f[:3].isdigit()
+    )
+
+
+def applied_migrations(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name        text PRIMARY KEY,
+            applied_at  timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+    cur.execute("SELECT name FROM schema_migrations")
+    return {r[0] for r in cur.fetchall()}
+
+
+def migrate():
+    """Runs each pending file in its own transaction"""
+    applied = []
+
+    with connection() as conn, conn.cursor() as cur:
+        done = applied_migrations(cur)
+        conn.commit()
+
+        for name in migration_files():
+            if name in done:
+                continue
+
+            with open(os.path.join(MIGRATIONS_DIR, name), encoding="utf-8") as f:
+                sql = f.read()
+
+            print(f"⏳ Applying {name}...")
+            cur.execute(sql)
+            cur.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (name,))
+            conn.commit()
+            applied.append(name)
+
+    return applied
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Apply database migrations")
+    parser.add_argument("--status", action="store_true", help="only list migrations")
+    args = parser.parse_args()
+
+    if args.status:
+        with connection() as conn, conn.cursor() as cur:
+            done = applied_migrations(cur)
+            conn.commit()
+        for name in migration_files():
+            print(f"  {'✅' if name in done else '⏳'} {name}")
+    else:
+        applied = migrate()
+        print(f"✅ {len(applied)} migration(s) applied" if applied else "✅ Schema up to date")
@@ -0,0 +1,49 @@
+-- 001_timetable_versions.sql
+-- =====================================================
+-- VERSIONED TIMETABLES
+-- Each generation is written under a new version; readers
+-- follow the single-row timetable_active pointer.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS timetable_versions (
+    version_id  serial PRIMARY KEY,
+    created_at  timestamptz NOT NULL DEFAULT now(),
+    entries     integer NOT NULL DEFAULT 0,
+    note        text
+);
+
+CREATE TABLE IF NOT EXISTS timetable_active (
+    singleton   boolean PRIMARY KEY DEFAULT true CHECK (singleton),
+    version_id  integer NOT NULL REFERENCES timetable_versions(version_id)
+);
+
+ALTER TABLE timetable
+    ADD COLUMN IF NOT EXISTS timetable_version integer
+    REFERENCES timetable_versions(version_id) ON DELETE CASCADE;
+
+-- -----------------------------------------------------
+-- Adopt the rows already in `timetable` as the first version
+-- -----------------------------------------------------
+INSERT INTO timetable_versions (entries, note)
+SELECT COUNT(*), 'pre-versioning timetable'
+FROM timetable
+WHERE NOT EXISTS (SELECT 1 FROM timetable_versions);
+
+UPDATE timetable
+SET timetable_version = (SELECT MIN(version_id) FROM timetable_versions)
+WHERE timetable_version IS NULL;
+
+INSERT INTO timetable_active (singleton, version_id)
+SELECT true, MIN(version_id) FROM timetable_versions
+ON CONFLICT (singleton) DO NOTHING;
+
+ALTER TABLE timetable ALTER COLUMN timetable_version SET NOT NULL;
+
+-- -----------------------------------------------------
+-- Reads always filter on the active version first
+-- -----------------------------------------------------
+CREATE INDEX IF NOT EXISTS timetable_version_class_idx
+    ON timetable (timetable_version, class_id);
+
+CREATE INDEX IF NOT EXISTS timetable_version_teacher_idx
+    ON timetable (timetable_version, teacher_id);
@@ -0,0 +1,53 @@
+-- 002_timetable_day_slot_idx.sql
+-- =====================================================
+-- INTEGER DAY / SLOT ORDERING + COVERING INDEXES
+-- Readers ORDER BY day_idx, slot_idx straight off an index
+-- instead of sorting on a CASE over the day name.
+-- =====================================================
+
+ALTER TABLE timetable
+    ADD COLUMN IF NOT EXISTS day_idx smallint,
+    ADD COLUMN IF NOT EXISTS slot_idx smallint;
+
+-- -----------------------------------------------------
+-- Backfill rows written before the writer set them
+-- -----------------------------------------------------
+UPDATE timetable
+SET day_idx = CASE
+        WHEN day IN ('Monday', 'Mon') THEN 1
+        WHEN day IN ('Tuesday', 'Tue') THEN 2
+        WHEN day IN ('Wednesday', 'Wed') THEN 3
+        WHEN day IN ('Thursday', 'Thu') THEN 4
+        WHEN day IN ('Friday', 'Fri') THEN 5
+        ELSE 6
+    END
+WHERE day_idx IS NULL;
+
+UPDATE timetable
+SET slot_idx = CASE start_time
+        WHEN '08:30' THEN 1
+        WHEN '09:30' THEN 2
+        WHEN '10:45' THEN 3
+        WHEN '11:45' THEN 4
+        WHEN '13:30' THEN 5
+        WHEN '14:30' THEN 6
+    END
+WHERE slot_idx IS NULL;
+
+-- -----------------------------------------------------
+-- Covering indexes – active version leads, then the
+-- per-request filter, then the display order
+-- -----------------------------------------------------
+DROP INDEX IF EXISTS timetable_version_class_idx;
+DROP INDEX IF EXISTS timetable_version_teacher_idx;
+
+CREATE INDEX IF NOT EXISTS timetable_class_order_idx
+    ON timetable (timetable_version, class_id, day_idx, slot_idx)
+    INCLUDE (subject_id, teacher_id, batch_id, is_lab, day, start_time, end_time);
+
+CREATE INDEX IF NOT EXISTS timetable_teacher_order_idx
+    ON timetable (timetable_version, teacher_id, day_idx, slot_idx)
+    INCLUDE (class_id, subject_id, batch_id, is_lab, day, start_time, end_time);
+
+CREATE INDEX IF NOT EXISTS timetable_version_order_idx
+    ON timetable (timetable_version, day_idx, slot_idx);
@@ -0,0 +1,19 @@
+-- 003_timetable_render.sql
+-- =====================================================
+-- MATERIALISED TIMETABLE VIEWS
+-- Class / teacher JSON rendered once per saved version
+-- (timetable_render.py); reads fetch one row by key.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS timetable_render (
+    version_id  integer NOT NULL
+                REFERENCES timetable_versions (version_id) ON DELETE CASCADE,
+    kind        text    NOT NULL,     -- 'class' | 'teacher' | 'all'
+    ref_id      integer NOT NULL,     -- class_id / teacher_id, 0 for 'all'
+    payload     text    NOT NULL,     -- response body, served as-is
+    PRIMARY KEY (version_id, kind, ref_id)
+);
+
+-- Existing versions are rendered lazily: until a version has
+-- rows here the endpoints fall back to the live joins.
+-- `python timetable_render.py` renders the active one.
@@ -0,0 +1,31 @@
+-- 004_allocation_unique.sql
+-- =====================================================
+-- UNIQUE ALLOCATIONS
+-- Lets the bulk allocation endpoints skip duplicates with
+-- INSERT ... ON CONFLICT DO NOTHING instead of a SELECT
+-- per row (allocations.py).
+-- =====================================================
+
+-- -----------------------------------------------------
+-- Drop duplicates left by concurrent single-row saves
+-- -----------------------------------------------------
+DELETE FROM teacher_subject_allocation a
+USING teacher_subject_allocation b
+WHERE a.ctid > b.ctid
+  AND a.teacher_id = b.teacher_id
+  AND a.subject_id = b.subject_id
+  AND a.class_id = b.class_id;
+
+DELETE FROM teacher_batch_subject_allocation a
+USING teacher_batch_subject_allocation b
+WHERE a.ctid > b.ctid
+  AND a.teacher_id = b.teacher_id
+  AND a.subject_id = b.subject_id
+  AND a.class_id = b.class_id
+  AND a.batch_id = b.batch_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS teacher_subject_allocation_uniq
+    ON teacher_subject_allocation (teacher_id, subject_id, class_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS teacher_batch_subject_allocation_uniq
+    ON teacher_batch_subject_allocation (teacher_id, subject_id, class_id, batch_id);
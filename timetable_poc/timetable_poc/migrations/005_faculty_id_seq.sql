@@ -0,0 +1,19 @@
+-- 005_faculty_id_seq.sql
+-- =====================================================
+-- FACULTY ID SEQUENCE
+-- Replaces MAX(faculty_id) + 1 in /api/faculty/preferences,
+-- which hands the same id to concurrent submissions.
+-- Approved faculty become teachers with the same id, so
+-- the sequence starts past both tables.
+-- =====================================================
+
+CREATE SEQUENCE IF NOT EXISTS faculty_id_seq;
+
+SELECT setval(
+    'faculty_id_seq',
+    GREATEST(
+        (SELECT COALESCE(MAX(faculty_id), 0) FROM faculty_subject_preferences),
+        (SELECT COALESCE(MAX(teacher_id), 0) FROM teachers),
+        1
+    )
+);
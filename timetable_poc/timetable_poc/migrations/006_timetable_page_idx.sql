@@ -0,0 +1,12 @@
+-- 006_timetable_page_idx.sql
+-- =====================================================
+-- KEYSET PAGINATION INDEX
+-- /api/timetable?after=day_idx,slot_idx,timetable_id
+-- seeks straight to the next page (timetable_query.py).
+-- Supersedes timetable_version_order_idx (migrations/002).
+-- =====================================================
+
+CREATE INDEX IF NOT EXISTS timetable_page_idx
+    ON timetable (timetable_version, day_idx, slot_idx, timetable_id);
+
+DROP INDEX IF EXISTS timetable_version_order_idx;
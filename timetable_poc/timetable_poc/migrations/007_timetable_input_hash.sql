@@ -0,0 +1,13 @@
+-- 007_timetable_input_hash.sql
+-- =====================================================
+-- GENERATION RESULT CACHE
+-- Each version remembers the hash of the solver input it
+-- was generated from (snapshot.solver_input_hash); a
+-- generate request with the same input reuses it.
+-- =====================================================
+
+ALTER TABLE timetable_versions
+    ADD COLUMN IF NOT EXISTS input_hash text;
+
+CREATE INDEX IF NOT EXISTS timetable_versions_input_hash_idx
+    ON timetable_versions (input_hash, version_id DESC);
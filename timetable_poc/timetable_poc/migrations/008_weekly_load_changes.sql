@@ -0,0 +1,27 @@
+-- 008_weekly_load_changes.sql
+-- =====================================================
+-- WEEKLY LOAD CHANGE LOG
+-- (teacher, subject, class) keys whose teacher_weekly_load
+-- row is stale; consumed by the incremental recalculation
+-- in weekly_load.py.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS weekly_load_changes (
+    teacher_id  integer NOT NULL,
+    subject_id  integer NOT NULL,
+    class_id    integer NOT NULL,
+    changed_at  timestamptz NOT NULL DEFAULT clock_timestamp(),
+    PRIMARY KEY (teacher_id, subject_id, class_id)
+);
+
+-- -----------------------------------------------------
+-- Seed with every current key so the first incremental
+-- run reconciles whatever changed before the log existed
+-- -----------------------------------------------------
+INSERT INTO weekly_load_changes (teacher_id, subject_id, class_id)
+SELECT teacher_id, subject_id, class_id FROM teacher_subject_allocation
+UNION
+SELECT teacher_id, subject_id, class_id FROM teacher_batch_subject_allocation
+UNION
+SELECT teacher_id, subject_id, class_id FROM teacher_weekly_load
+ON CONFLICT DO NOTHING;
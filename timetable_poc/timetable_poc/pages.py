@@ -0,0 +1,58 @@
+# pages.py
+# =====================================================
+# HOD / FACULTY PAGE RENDERING
+# Layouts are compiled by Jinja once and page fragments
+# read once per process. Files are re-checked by mtime
+# only when templates auto-reload (debug mode).
+# Asset links are rewritten to fingerprinted URLs on load.
+# =====================================================
+
+import os
+import threading
+
+from flask import Response, current_app
+
+import assets
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+
+# path → ((mtime, asset version), compiled template / fragment text)
+_cache = {}
+_lock = threading.Lock()
+
+
+def _load(path, build):
+    """Cached build(source) of a frontend file; reloaded on mtime change in debug"""
+    full = os.path.join(FRONTEND_DIR, path)
+    item = _cache.get(path)
+
+    if item is not None and not current_app.jinja_env.auto_reload:
+        return item[1]
+
+    stamp = (os.path.getmtime(full), assets.version())
+    if item is not None and item[0] == stamp:
+        return item[1]
+
+    with _lock:
+        with open(full, encoding="utf-8") as f:
+            value = build(assets.rewrite_html(f.read()))
+        _cache[path] = (stamp, value)
+    return value
+
+
+def layout(path):
+    return _load(path, current_app.jinja_env.from_string)
+
+
+def fragment(path):
+    return _load(path, lambda source: source)
+
+
+def render_page(layout_path, page_path, title):
+    """Page fragment wrapped in its layout, e.g. ("hod/layout.html", "hod/hod_dashboard.html")"""
+    return layout(layout_path).render(title=title, content=fragment(page_path))
+
+
+def static_page(path):
+    """A whole HTML file from frontend/ (landing, login, public view)"""
+    return Response(fragment(path), mimetype="text/html")
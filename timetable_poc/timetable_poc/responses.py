@@ -0,0 +1,145 @@
+# responses.py
+# =====================================================
+# API RESPONSE LAYER
+# - JSON through orjson when installed (pip install orjson),
+#   otherwise Flask's stdlib provider – same output either way
+# - gzip / brotli negotiated for bodies above a threshold;
+#   compressed bodies are memoised per ETag so cached views
+#   are compressed once, not per request
+# =====================================================
+
+import datetime
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "text/html",
+    "text/plain",
+}
+
+# (etag, encoding) → compressed body
+_COMPRESSED_MAX_ENTRIES = 256
+_compressed = OrderedDict()
+_compressed_lock = threading.Lock()
+
+
+# -------------------------------
+# JSON
+# -------------------------------
+def _default(o):
+    # times as the views always rendered them: "08:30:00"
+    if isinstance(o, datetime.time):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+def dumps(obj, sort_keys=False):
+    """obj → JSON text"""
+    if orjson is None:
+        return json.dumps(obj, default=_default, sort_keys=sort_keys)
+    option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return orjson.dumps(obj, default=_default, option=option).decode()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """app.json – jsonify() through orjson when available"""
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs.get("indent"):
+            kwargs.setdefault("default", _default)
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, sort_keys=kwargs.get("sort_keys", self.sort_keys))
+
+
+# -------------------------------
+# COMPRESSION
+# -------------------------------
+def negotiate(accept_encoding):
+    for enc in ("br", "gzip"):
+        if enc == "br" and brotli is None:
+            continue
+        if enc in accept_encoding:
+            return enc
+    return None
+
+
+def _compress(body, enc):
+    if enc == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def _compress_memo(etag, body, enc):
+    if not etag:
+        return _compress(body, enc)
+
+    key = (etag, enc)
+    with _compressed_lock:
+        if key in _compressed:
+            _compressed.move_to_end(key)
+            return _compressed[key]
+
+    data = _compress(body, enc)
+    with _compressed_lock:
+        _compressed[key] = data
+        while len(_compressed) > _COMPRESSED_MAX_ENTRIES:
+            _compressed.popitem(last=False)
+    return data
+
+
+def compress(resp):
+    """
+    Compresses a buffered 200 response in place when the client
+    accepts it and the body is large enough. The ETag gets an
+    encoding suffix so conditional requests stay exact.
+    """
+    if (
+        resp.status_code != 200
+        or resp.is_streamed
+        or resp.direct_passthrough
+        or "Content-Encoding" in resp.headers
+        or resp.mimetype not in COMPRESS_MIMETYPES
+    ):
+        return resp
+
+    body = resp.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return resp
+
+    resp.vary.add("Accept-Encoding")
+    enc = negotiate(request.headers.get("Accept-Encoding", ""))
+    if enc is None:
+        return resp
+
+    etag, weak = resp.get_etag()
+    resp.set_data(_compress_memo(etag, body, enc))
+    resp.headers["Content-Encoding"] = enc
+    if etag:
+        resp.set_etag(f"{etag}-{enc}", weak)
+    return resp
+
+
+def init_app(app):
+    app.json = FastJSONProvider(app)
+    app.after_request(compress)
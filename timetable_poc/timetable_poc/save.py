@@ -1,21 +1,4 @@
-from db import get_connection
+from timetable_writer import save_timetable as write_timetable
 
 def save_timetable(timetable):
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("DELETE FROM timetable")
-
-    for entry in timetable:
-        cur.execute("""
-            INSERT INTO timetable (class_id, subject_id, teacher_id, slot_id)
-            VALUES (%s, %s, %s, %s)
-        """, (
-            entry["class_id"],
-            entry["subject_id"],
-            entry["teacher_id"],
-            entry["slot_id"]
-        ))
-
-    conn.commit()
-    conn.close()
+    return write_timetable(timetable)
@@ -102,6 +102,40 @@ CLASS_SLOT_RULES = {
 }
 
 
+# -------------------------------
+# EXTRA DIVISIONS
+# Divisions without an explicit rule (SE-D, TE-C, ...) rotate
+# through the A / B / C patterns by division letter
+# -------------------------------
+
+DIVISION_PATTERNS = [
+    CLASS_SLOT_RULES["SE-A"],   # morning labs
+    CLASS_SLOT_RULES["SE-B"],   # midday labs
+    CLASS_SLOT_RULES["SE-C"]    # afternoon labs
+]
+
+
+def get_class_slot_rules(class_name):
+    """
+    Returns the slot rules for a class, falling back to the
+    rotating division pattern for classes not listed above
+    """
+    rules = CLASS_SLOT_RULES.get(class_name)
+    if rules is not None:
+        return rules
+
+    # "SE-D" → D → 3, "SE-AB" → 27 (spreadsheet-style lettering)
+    division = class_name.rsplit("-", 1)[-1].upper()
+    index = 0
+    for ch in division:
+        if not "A" <= ch <= "Z":
+            index = 0
+            break
+        index = index * 26 + (ord(ch) - ord("A") + 1)
+
+    return DIVISION_PATTERNS[max(index - 1, 0) % len(DIVISION_PATTERNS)]
+
+
 # -------------------------------
 # HELPER FUNCTIONS
 # -------------------------------
@@ -111,21 +145,21 @@ def get_lab_slot_groups(class_name):
     Returns ordered list of lab windows: preferred → fallback
     This allows the generator to try preferred slots first
     """
-    return CLASS_SLOT_RULES[class_name]["LAB_PRIORITY"]
+    return get_class_slot_rules(class_name)["LAB_PRIORITY"]
 
 
 def get_lab_slots(class_name):
     """
     Returns primary lab window (used for validation)
     """
-    return CLASS_SLOT_RULES[class_name]["LAB_PRIORITY"][0]
+    return get_class_slot_rules(class_name)["LAB_PRIORITY"][0]
 
 
 def get_lecture_slots(class_name):
     """
     Returns list of valid lecture slots for a class
     """
-    return CLASS_SLOT_RULES[class_name]["LECTURE"]
+    return get_class_slot_rules(class_name)["LECTURE"]
 
 
 def get_slot_time(slot_id):
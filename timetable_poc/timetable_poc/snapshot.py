@@ -0,0 +1,170 @@
+# snapshot.py
+# =====================================================
+# ON-DISK SNAPSHOT CACHE OF SOLVER INPUT
+# Keyed by a cheap database change fingerprint
+# =====================================================
+
+import hashlib
+import os
+import pickle
+import tempfile
+
+from fetch_data import load_solver_input
+from slot_maps import SLOTS, LAB_SLOT_GROUPS, CLASS_SLOT_RULES
+
+# Bump when the layout returned by load_solver_input() changes
+SNAPSHOT_FORMAT = 1
+
+# Bump when the generator's output for the same input changes
+SOLVER_VERSION = 1
+
+# Raw tables of the solver input (the lookup maps derive from them)
+INPUT_TABLES = [
+    "classes",
+    "subjects",
+    "teachers",
+    "allocations",
+    "weekly_loads",
+    "batches",
+    "batch_allocations",
+]
+
+def _default_snapshot_dir():
+    # Per-user directory: the temp dir is shared, and a snapshot is
+    # unpickled, so nobody else may be able to plant one there
+    uid = os.getuid() if hasattr(os, "getuid") else os.getenv("USERNAME", "user")
+    return os.path.join(tempfile.gettempdir(), f"timetable_snapshots-{uid}")
+
+
+SNAPSHOT_DIR = os.getenv("SOLVER_SNAPSHOT_DIR") or _default_snapshot_dir()
+SNAPSHOT_FILE = os.path.join(SNAPSHOT_DIR, "solver_input.pkl")
+
+# Every table load_solver_input() reads from
+SOURCE_TABLES = [
+    "classes",
+    "subjects",
+    "teachers",
+    "teacher_subject_allocation",
+    "teacher_weekly_load",
+    "class_batches",
+    "teacher_batch_subject_allocation",
+]
+
+
+# -------------------------------
+# FINGERPRINT
+# -------------------------------
+def db_fingerprint(cursor):
+    """
+    Row count + newest row xmin per source table, in one round-trip.
+    Inserts and updates move xmin, deletes move the count.
+    """
+    cursor.execute(" UNION ALL ".join(
+        f"SELECT '{table}', COUNT(*), "
+        f"COALESCE(MAX(xmin::text::bigint), 0) FROM {table}"
+        for table in SOURCE_TABLES
+    ))
+    return tuple(sorted(cursor.fetchall()))
+
+
+def solver_input_hash(data, **options):
+    """
+    Content hash of everything the generator's output depends on:
+    the raw input tables (order-insensitive), the generated classes,
+    the slot rules and any run options (e.g. generations).
+    """
+    h = hashlib.sha256()
+    h.update(f"solver:{SOLVER_VERSION}\n".encode())
+
+    for table in INPUT_TABLES:
+        h.update(f"{table}\n".encode())
+        for row in sorted(repr(r) for r in data.get(table, [])):
+            h.update(row.encode())
+            h.update(b"\n")
+
+    h.update(repr(sorted(data["class_map"].items())).encode())
+    h.update(repr((SLOTS, LAB_SLOT_GROUPS, CLASS_SLOT_RULES)).encode())
+    h.update(repr(sorted(options.items())).encode())
+    return h.hexdigest()
+
+
+# -------------------------------
+# SNAPSHOT FILE
+# -------------------------------
+def _owned_by_us(st):
+    """File / directory belongs to this user and nobody else can write it"""
+    if not hasattr(os, "getuid"):
+        return True
+    return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+
+def _ensure_snapshot_dir():
+    """Creates SNAPSHOT_DIR with mode 0700; False if it can't be trusted"""
+    os.makedirs(SNAPSHOT_DIR, mode=0o700, exist_ok=True)
+    return _owned_by_us(os.stat(SNAPSHOT_DIR))
+
+
+def read_snapshot(fingerprint):
+    """Returns cached solver input, or None when stale/missing/untrusted"""
+    try:
+        with open(SNAPSHOT_FILE, "rb") as f:
+            if not (_owned_by_us(os.fstat(f.fileno()))
+                    and _owned_by_us(os.stat(SNAPSHOT_DIR))):
+                print("⚠️ Ignoring solver snapshot not owned by this user")
+                return None
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+    if snapshot.get("format") != SNAPSHOT_FORMAT:
+        return None
+    if snapshot.get("fingerprint") != fingerprint:
+        return None
+
+    return snapshot["data"]
+
+
+def write_snapshot(fingerprint, data):
+    """Atomically replaces the snapshot file"""
+    try:
+        if not _ensure_snapshot_dir():
+            print("⚠️ Solver snapshot dir not owned by this user – not caching")
+            return
+    except OSError:
+        return
+
+    fd, tmp_path = tempfile.mkstemp(dir=SNAPSHOT_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump({
+                "format": SNAPSHOT_FORMAT,
+                "fingerprint": fingerprint,
+                "data": data
+            }, f, protocol=5)
+        os.replace(tmp_path, SNAPSHOT_FILE)
+    except OSError:
+        # Read-only filesystem etc. – caching is best effort
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+# -------------------------------
+# CACHED LOADER
+# -------------------------------
+def load_solver_input_cached(cursor):
+    """
+    Drop-in for fetch_data.load_solver_input().
+    Only re-queries the source tables when the fingerprint moved.
+    """
+    fingerprint = db_fingerprint(cursor)
+
+    data = read_snapshot(fingerprint)
+    if data is not None:
+        print("📦 Solver input loaded from snapshot")
+        return data
+
+    data = load_solver_input(cursor)
+    write_snapshot(fingerprint, data)
+    return data
@@ -0,0 +1,272 @@
+# synthetic_data.py
+# =====================================================
+# SYNTHETIC INSTITUTION GENERATOR FOR SCALE TESTING
+# Produces solver input in the fetch_data / fixture schema
+# =====================================================
+
+import random
+from collections import defaultdict
+
+from fetch_data import add_lookup_maps
+from slot_maps import get_lab_slots
+
+YEARS = ["SE", "TE", "BE"]
+
+# Divisions per year today: SE-A..C, TE-A..B, BE-A..B (7 total)
+CURRENT_DIVISIONS = {"SE": 3, "TE": 2, "BE": 2}
+
+# Per-year curriculum shape
+THEORY_SUBJECTS_PER_YEAR = 4
+THEORY_HOURS = 3
+LAB_SUBJECTS_PER_YEAR = 2
+BATCHES_PER_DIVISION = 3
+
+# Faculty sizing: weekly theory hours per teacher.
+# The generator blocks a teacher's whole 2-slot window once they
+# teach in it, so a teacher fits at most ~2 lectures per day.
+TARGET_THEORY_HOURS = 6
+
+
+def division_name(index):
+    """0 → A, 25 → Z, 26 → AA (spreadsheet-style)"""
+    name = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        name = chr(ord("A") + rem) + name
+    return name
+
+
+def divisions_for_scale(scale):
+    """Divisions per year for N× today's 7 divisions"""
+    return {
+        year: count * scale
+        for year, count in CURRENT_DIVISIONS.items()
+    }
+
+
+def generate_institution(divisions, teachers=None, seed=0):
+    """
+    Builds a synthetic department.
+
+    divisions: {"SE": n, "TE": n, "BE": n} or an int for every year
+    teachers:  faculty size (default: sized to TARGET_THEORY_HOURS)
+    seed:      makes the dataset reproducible
+
+    Returns the solver-input dict (raw tables + lookup maps).
+    """
+    rng = random.Random(seed)
+
+    if isinstance(divisions, int):
+        divisions = {year: divisions for year in YEARS}
+
+    classes = []
+    subjects = []
+    batches = []
+
+    # (year, subject_id, is_lab)
+    curriculum = []
+
+    for year in YEARS:
+        for i in range(THEORY_SUBJECTS_PER_YEAR):
+            subject_id = len(subjects) + 1
+            subjects.append((subject_id, f"{year} Theory {i + 1}", False))
+            curriculum.append((year, subject_id, False))
+
+        for i in range(LAB_SUBJECTS_PER_YEAR):
+            subject_id = len(subjects) + 1
+            subjects.append((subject_id, f"{year} Lab {i + 1}", True))
+            curriculum.append((year, subject_id, True))
+
+    # ---------------------------
+    # Classes + batches
+    # ---------------------------
+    class_batches = {}
+    for year in YEARS:
+        for d in range(divisions.get(year, 0)):
+            class_id = len(classes) + 1
+            div = division_name(d)
+            classes.append((class_id, f"{year}-{div}"))
+
+            class_batches[class_id] = []
+            for b in range(BATCHES_PER_DIVISION):
+                batch_id = len(batches) + 1
+                batches.append((batch_id, class_id, f"{div}{b + 1}"))
+                class_batches[class_id].append(batch_id)
+
+    # ---------------------------
+    # Teaching jobs to staff
+    # (subject, class, theory hours, lab batches)
+    # ---------------------------
+    jobs = []
+    for class_id, class_name in classes:
+        year = class_name.split("-")[0]
+        for y, subject_id, is_lab in curriculum:
+            if y != year:
+                continue
+            if is_lab:
+                jobs.append((subject_id, class_id, 0, class_batches[class_id]))
+            else:
+                jobs.append((subject_id, class_id, THEORY_HOURS, []))
+
+    def job_hours(job):
+        # a lab session occupies a 2-hour window per batch
+        return job[2] + 2 * len(job[3])
+
+    # Faculty is split into pools by the class's lab pattern, so a
+    # teacher's labs and lectures fall in compatible windows
+    # (as in the real timetable, where staff follow their divisions)
+    pools = defaultdict(list)
+    class_names = dict(classes)
+    for job in jobs:
+        pools[get_lab_slots(class_names[job[1]])].append(job)
+
+    total_hours = sum(job_hours(j) for j in jobs)
+    if teachers is None:
+        theory_hours = sum(j[2] for j in jobs)
+        teachers = max(len(pools), -(-theory_hours // TARGET_THEORY_HOURS))
+    elif teachers < len(pools):
+        # every pool needs at least one teacher of its own
+        raise ValueError(f"teachers must be at least {len(pools)} (one per subject pool)")
+
+    teacher_rows = [
+        (
+            t,
+            f"Teacher {t}",
+            rng.choice([3, 4, 4]),   # max_lectures_per_day
+            rng.choice([2, 3]),      # max_practicals_per_day
+            20                       # max_lectures_per_week
+        )
+        for t in range(1, teachers + 1)
+    ]
+
+    # Share of the faculty per pool, proportional to its hours
+    pool_teachers = {}
+    next_teacher = 0
+    for i, (pool, pool_jobs) in enumerate(sorted(pools.items())):
+        if i == len(pools) - 1:
+            count = teachers - next_teacher
+        else:
+            pool_hours = sum(job_hours(j) for j in pool_jobs)
+            count = max(1, round(teachers * pool_hours / total_hours))
+            count = min(count, teachers - next_teacher - (len(pools) - i - 1))
+        pool_teachers[pool] = [
+            t[0] for t in teacher_rows[next_teacher:next_teacher + count]
+        ]
+        next_teacher += count
+
+    # ---------------------------
+    # Greedy least-loaded assignment
+    # ---------------------------
+    allocations = []
+    weekly_loads = []
+    batch_allocations = []
+
+    for pool, pool_jobs in sorted(pools.items()):
+        # Balance theory first (the scarce resource), then total hours
+        load = {t: [0, 0] for t in pool_teachers[pool]}
+
+        rng.shuffle(pool_jobs)
+        pool_jobs.sort(key=lambda j: (j[2], job_hours(j)), reverse=True)
+
+        for subject_id, class_id, theory, lab_batches in pool_jobs:
+            if theory:
+                teacher_id = min(load, key=lambda t: (load[t], rng.random()))
+            else:
+                teacher_id = min(load, key=lambda t: (load[t][1], rng.random()))
+            load[teacher_id][0] += theory
+            load[teacher_id][1] += theory + 2 * len(lab_batches)
+
+            if theory:
+                allocations.append((teacher_id, subject_id, class_id))
+            for batch_id in lab_batches:
+                batch_allocations.append((teacher_id, subject_id, class_id, batch_id))
+
+            weekly_loads.append((
+                teacher_id,
+                subject_id,
+                class_id,
+                theory,
+                len(lab_batches)   # one session per batch
+            ))
+
+    data = {
+        "classes": sorted(classes, key=lambda c: c[1]),
+        "subjects": subjects,
+        "teachers": teacher_rows,
+        "allocations": allocations,
+        "weekly_loads": weekly_loads,
+        "batches": batches,
+        "batch_allocations": batch_allocations,
+    }
+
+    return add_lookup_maps(data)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic institution dataset"
+    )
+    parser.add_argument(
+        "--scale", type=int, default=1,
+        help="multiple of today's 7 divisions (3/2/2 per year)"
+    )
+    parser.add_argument(
+        "--divisions", type=int,
+        help="divisions per year (overrides --scale)"
+    )
+    parser.add_argument("--teachers", type=int, help="faculty size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write CSV fixtures to this directory")
+    parser.add_argument(
+        "--run", action="store_true",
+        help="time generate_timetable + validate_timetable on the dataset"
+    )
+    parser.add_argument(
+        "--optimize", type=int, metavar="GENERATIONS",
+        help="also time ga_optimizer.optimize for this many generations"
+    )
+    args = parser.parse_args()
+
+    divisions = args.divisions or divisions_for_scale(args.scale)
+    data = generate_institution(divisions, args.teachers, args.seed)
+
+    print(
+        f"🏫 {len(data['classes'])} classes, "
+        f"{len(data['teachers'])} teachers, "
+        f"{len(data['batches'])} batches, "
+        f"{len(data['weekly_loads'])} weekly load rows"
+    )
+
+    if args.out:
+        from data_source import write_fixtures
+        write_fixtures(data, args.out)
+        print(f"✅ Fixtures written to {args.out}")
+
+    if args.run or args.optimize:
+        from generator import generate_timetable, build_weekly_load_map
+        from constraints import validate_timetable
+
+        start = time.perf_counter()
+        timetable = generate_timetable(data)
+        print(f"⏱️  generate_timetable: {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        valid = validate_timetable(
+            timetable,
+            build_weekly_load_map(data["weekly_loads"]),
+            data["teacher_limits"],
+            data["allocation_set"],
+            data["batch_allocation_set"]
+        )
+        print(f"⏱️  validate_timetable: {time.perf_counter() - start:.2f}s (valid={valid})")
+
+        if args.optimize:
+            import ga_optimizer
+
+            start = time.perf_counter()
+            ga_optimizer.optimize(data, generations=args.optimize)
+            print(f"⏱️  ga_optimizer.optimize({args.optimize}): {time.perf_counter() - start:.2f}s")
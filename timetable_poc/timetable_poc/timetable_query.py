@@ -0,0 +1,174 @@
+# timetable_query.py
+# =====================================================
+# FILTERED / PAGED TIMETABLE ROWS (/api/timetable)
+# Keyset pagination on (day_idx, slot_idx, timetable_id),
+# class / day / type filters, a field projection and an
+# NDJSON stream read through a server-side named cursor.
+# Served from timetable_page_idx (migrations/006).
+# =====================================================
+
+from timetable_writer import ACTIVE_VERSION_SQL
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+# Rows fetched per round trip by the streaming cursor
+STREAM_ITERSIZE = 1000
+
+# Public field name → SQL expression (order = default output order)
+FIELDS = {
+    "class": "c.class_name",
+    "subject": "s.subject_name",
+    "teacher": "t.teacher_name",
+    "day": "tt.day",
+    "start_time": "tt.start_time",
+    "end_time": "tt.end_time",
+    "type": "CASE WHEN s.is_lab THEN 'LAB' ELSE 'LECTURE' END",
+    "batch": "cb.batch_name",
+}
+
+# Always selected – the pagination key
+CURSOR_SQL = ("tt.day_idx", "tt.slot_idx", "tt.timetable_id")
+
+
+class QueryError(ValueError):
+    """Bad query-string parameter → 400"""
+
+
+# -------------------------------
+# PARAMETERS
+# -------------------------------
+def _int(args, name):
+    value = args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryError(f"{name} must be an integer")
+
+
+def parse_fields(value):
+    if not value:
+        return list(FIELDS)
+    fields = [f.strip() for f in value.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in FIELDS]
+    if unknown:
+        raise QueryError(f"Unknown field(s) {unknown}; choose from {list(FIELDS)}")
+    return fields
+
+
+def parse_after(value):
+    """"day_idx,slot_idx,timetable_id" → tuple, or None"""
+    if not value:
+        return None
+    try:
+        after = tuple(int(v) for v in value.split(","))
+    except ValueError:
+        after = ()
+    if len(after) != 3:
+        raise QueryError("after must be day_idx,slot_idx,timetable_id")
+    return after
+
+
+def parse_query(args):
+    """request.args → query dict"""
+    limit = _int(args, "limit")
+    if limit is not None and not 1 <= limit <= MAX_LIMIT:
+        raise QueryError(f"limit must be between 1 and {MAX_LIMIT}")
+
+    type_ = (args.get("type") or "").upper() or None
+    if type_ not in (None, "LAB", "LECTURE"):
+        raise QueryError("type must be LAB or LECTURE")
+
+    return {
+        "teacher_id": _int(args, "teacher_id"),
+        "class_id": _int(args, "class_id"),
+        "class": args.get("class") or None,
+        "day": args.get("day") or None,
+        "type": type_,
+        "fields": parse_fields(args.get("fields")),
+        "after": parse_after(args.get("after")),
+        "limit": limit,
+    }
+
+
+# -------------------------------
+# SQL
+# -------------------------------
+def build_sql(query, limit=None):
+    """(sql, params) for the filtered, ordered, optionally limited rows"""
+    where = [f"tt.timetable_version = {ACTIVE_VERSION_SQL}"]
+    params = []
+
+    for key, clause in (
+        ("teacher_id", "tt.teacher_id = %s"),
+        ("class_id", "tt.class_id = %s"),
+        ("class", "c.class_name = %s"),
+        ("day", "tt.day = %s"),
+    ):
+        if query[key] is not None:
+            where.append(clause)
+            params.append(query[key])
+
+    if query["type"] is not None:
+        where.append("s.is_lab = %s")
+        params.append(query["type"] == "LAB")
+
+    if query["after"] is not None:
+        where.append("(tt.day_idx, tt.slot_idx, tt.timetable_id) > (%s, %s, %s)")
+        params.extend(query["after"])
+
+    columns = ", ".join([FIELDS[f] for f in query["fields"]] + list(CURSOR_SQL))
+    sql = f"""
+        SELECT {columns}
+        FROM timetable tt
+        JOIN classes c ON c.class_id = tt.class_id
+        JOIN subjects s ON s.subject_id = tt.subject_id
+        JOIN teachers t ON t.teacher_id = tt.teacher_id
+        LEFT JOIN class_batches cb ON cb.batch_id = tt.batch_id
+        WHERE {' AND '.join(where)}
+        ORDER BY tt.day_idx, tt.slot_idx, tt.timetable_id
+    """
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return sql, params
+
+
+def _item(fields, row):
+    return dict(zip(fields, row))
+
+
+# -------------------------------
+# PAGE / STREAM
+# -------------------------------
+def fetch_page(cur, query):
+    """{"items": [...], "next_after": "d,s,id" | None}"""
+    limit = query["limit"] or DEFAULT_LIMIT
+    cur.execute(*build_sql(query, limit + 1))
+    rows = cur.fetchall()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    fields = query["fields"]
+    n = len(fields)
+
+    return {
+        "items": [_item(fields, r[:n]) for r in rows],
+        "next_after": ",".join(str(v) for v in rows[-1][n:]) if more else None,
+    }
+
+
+def stream_rows(conn, query):
+    """
+    Yields projected rows from a server-side (named) cursor, so
+    memory stays flat however many rows match.
+    """
+    fields = query["fields"]
+    n = len(fields)
+    with conn.cursor(name="timetable_stream") as cur:
+        cur.itersize = STREAM_ITERSIZE
+        cur.execute(*build_sql(query, query["limit"]))
+        for row in cur:
+            yield _item(fields, row[:n])
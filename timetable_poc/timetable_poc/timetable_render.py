@@ -0,0 +1,272 @@
+# timetable_render.py
+# =====================================================
+# MATERIALISED TIMETABLE VIEWS
+# The class and teacher views are pure functions of a
+# timetable version, so they are rendered once per save
+# into `timetable_render` (migrations/003) and served as
+# stored JSON – no joins on the read path.
+# =====================================================
+
+from psycopg2.extras import execute_values
+
+from responses import dumps
+from slot_maps import SLOTS
+from timetable_writer import ACTIVE_VERSION_SQL
+
+# timetable_render.kind values; "all" uses ref_id 0
+CLASS = "class"
+TEACHER = "teacher"
+ALL = "all"
+
+
+# -------------------------------
+# CLASS VIEW (/api/hod/timetable)
+# -------------------------------
+# One set-based query: the class (for the year prefix), batch names
+# and the assigned short_name are all joined in – no per-row lookups
+CLASS_ROWS_SQL = """
+    SELECT
+        t.class_id,
+        t.day,
+        t.start_time,
+        t.end_time,
+        s.subject_name,
+        COALESCE(pref.short_name, LEFT(te.teacher_name, 3)) as short_name,
+        t.is_lab,
+        t.batch_id,
+        cb.batch_name,
+        c.class_name,
+        t.day_idx,
+        t.slot_idx
+    FROM timetable t
+    JOIN classes c ON c.class_id = t.class_id
+    JOIN subjects s ON s.subject_id = t.subject_id
+    JOIN teachers te ON te.teacher_id = t.teacher_id
+    LEFT JOIN class_batches cb ON cb.batch_id = t.batch_id
+    LEFT JOIN faculty_subject_preferences pref
+        ON pref.faculty_id = t.teacher_id
+        AND pref.year_level = LEFT(c.class_name, 2)
+        AND pref.allocated_subject = s.subject_name
+    WHERE t.timetable_version = {version}
+      {where}
+    ORDER BY t.class_id, t.day_idx, t.slot_idx
+"""
+
+
+def _display(subject, short_name, is_lab, batch_id, batch_name):
+    if is_lab and batch_id:
+        return f"{subject} ({short_name})<br>{batch_name or f'B{batch_id}'}"
+    return f"{subject} ({short_name})"
+
+
+def class_views(rows):
+    """CLASS_ROWS_SQL rows → {class_id: [{day, start_time, end_time, display}]}"""
+    views = {}
+    for row in rows:
+        class_id, day, start_time, end_time, subject, short_name, is_lab, batch_id, batch_name = row[:9]
+
+        views.setdefault(class_id, []).append({
+            "day": day,
+            "start_time": start_time,
+            "end_time": end_time,
+            "display": _display(subject, short_name, is_lab, batch_id, batch_name)
+        })
+    return views
+
+
+def live_class_view(cur, class_id):
+    """Renders one class of the active version straight from `timetable`"""
+    cur.execute(
+        CLASS_ROWS_SQL.format(version=ACTIVE_VERSION_SQL, where="AND t.class_id = %s"),
+        (class_id,)
+    )
+    return class_views(cur.fetchall()).get(int(class_id), [])
+
+
+# -------------------------------
+# CLASS GRIDS (/api/timetable/grid)
+# Many classes from one CLASS_ROWS_SQL query, each as a
+# day × slot grid; a cell lists every entry in the slot
+# (parallel lab batches)
+# -------------------------------
+GRID_DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri")   # day_idx 1..5
+
+GRID_SLOTS = [
+    {"slot": slot, "start": span.split("-")[0], "end": span.split("-")[1]}
+    for slot, span in sorted(SLOTS.items())
+]
+
+
+def class_grids(rows):
+    """CLASS_ROWS_SQL rows → [{class_id, class_name, grid: {day: [[cell], ...]}}]"""
+    grids = {}
+    for row in rows:
+        (class_id, _, _, _, subject, short_name, is_lab,
+         batch_id, batch_name, class_name, day_idx, slot_idx) = row
+
+        entry = grids.get(class_id)
+        if entry is None:
+            entry = grids[class_id] = {
+                "class_id": class_id,
+                "class_name": class_name,
+                "grid": {day: [[] for _ in GRID_SLOTS] for day in GRID_DAYS},
+            }
+
+        if not (day_idx and 1 <= day_idx <= len(GRID_DAYS) and slot_idx in SLOTS):
+            continue
+
+        entry["grid"][GRID_DAYS[day_idx - 1]][slot_idx - 1].append({
+            "subject": subject,
+            "short_name": short_name,
+            "is_lab": is_lab,
+            "batch": batch_name or (f"B{batch_id}" if batch_id else None),
+            "display": _display(subject, short_name, is_lab, batch_id, batch_name),
+        })
+    return list(grids.values())
+
+
+def live_class_grids(cur, class_ids=None):
+    """Grids of the given classes (all when None) of the active version"""
+    if class_ids:
+        cur.execute(
+            CLASS_ROWS_SQL.format(version=ACTIVE_VERSION_SQL, where="AND t.class_id = ANY(%s)"),
+            (list(class_ids),)
+        )
+    else:
+        cur.execute(CLASS_ROWS_SQL.format(version=ACTIVE_VERSION_SQL, where=""))
+
+    return {
+        "days": list(GRID_DAYS),
+        "slots": GRID_SLOTS,
+        "classes": class_grids(cur.fetchall()),
+    }
+
+
+# -------------------------------
+# TEACHER VIEW (/api/timetable)
+# -------------------------------
+TEACHER_ROWS_SQL = """
+    SELECT
+        tt.teacher_id,
+        c.class_name,
+        s.subject_name,
+        t.teacher_name,
+        tt.day,
+        tt.start_time,
+        tt.end_time,
+        s.is_lab,
+        cb.batch_name
+    FROM timetable tt
+    JOIN classes c ON c.class_id = tt.class_id
+    JOIN subjects s ON s.subject_id = tt.subject_id
+    JOIN teachers t ON t.teacher_id = tt.teacher_id
+    LEFT JOIN class_batches cb ON cb.batch_id = tt.batch_id
+    WHERE tt.timetable_version = {version}
+      {where}
+    ORDER BY tt.day_idx, tt.slot_idx
+"""
+
+
+def teacher_views(rows):
+    """TEACHER_ROWS_SQL rows → ({teacher_id: [entry]}, [every entry])"""
+    views = {}
+    everything = []
+    for row in rows:
+        teacher_id, class_name, subject, teacher, day, start_time, end_time, is_lab, batch_name = row
+
+        entry = {
+            "class": class_name,
+            "subject": subject,
+            "teacher": teacher,
+            "day": day,
+            "start_time": start_time,
+            "end_time": end_time,
+            "type": "LAB" if is_lab else "LECTURE",
+            "batch": batch_name
+        }
+        views.setdefault(teacher_id, []).append(entry)
+        everything.append(entry)
+    return views, everything
+
+
+def live_teacher_view(cur, teacher_id=None):
+    """One teacher (or everyone) of the active version from `timetable`"""
+    if teacher_id:
+        cur.execute(
+            TEACHER_ROWS_SQL.format(version=ACTIVE_VERSION_SQL, where="AND tt.teacher_id = %s"),
+            (teacher_id,)
+        )
+        views, _ = teacher_views(cur.fetchall())
+        return views.get(int(teacher_id), [])
+
+    cur.execute(TEACHER_ROWS_SQL.format(version=ACTIVE_VERSION_SQL, where=""))
+    _, everything = teacher_views(cur.fetchall())
+    return everything
+
+
+# -------------------------------
+# MATERIALISE / FETCH
+# -------------------------------
+def render_version(cur, version_id):
+    """
+    (Re)renders every class and teacher view of one version into
+    `timetable_render` inside the caller's transaction.
+    Returns the number of payloads stored.
+    """
+    cur.execute(CLASS_ROWS_SQL.format(version="%s", where=""), (version_id,))
+    classes = class_views(cur.fetchall())
+
+    cur.execute(TEACHER_ROWS_SQL.format(version="%s", where=""), (version_id,))
+    teachers, everything = teacher_views(cur.fetchall())
+
+    payloads = (
+        [(version_id, CLASS, k, dumps(v)) for k, v in classes.items()]
+        + [(version_id, TEACHER, k, dumps(v)) for k, v in teachers.items()]
+        + [(version_id, ALL, 0, dumps(everything))]
+    )
+
+    cur.execute("DELETE FROM timetable_render WHERE version_id = %s", (version_id,))
+    execute_values(
+        cur,
+        "INSERT INTO timetable_render (version_id, kind, ref_id, payload) VALUES %s",
+        payloads,
+        page_size=len(payloads)
+    )
+    return len(payloads)
+
+
+def render_active(cur):
+    """Re-renders the active version after its joined data changed"""
+    cur.execute("SELECT version_id FROM timetable_active")
+    row = cur.fetchone()
+    return render_version(cur, row[0]) if row else 0
+
+
+def fetch_view(cur, kind, ref_id=0):
+    """
+    Stored JSON text of one view of the active version.
+    Returns "[]" when the version was rendered but has no rows for
+    ref_id, and None when the version was never rendered.
+    """
+    cur.execute("""
+        SELECT
+            (SELECT payload FROM timetable_render
+             WHERE version_id = a.version_id AND kind = %s AND ref_id = %s),
+            EXISTS (SELECT 1 FROM timetable_render
+                    WHERE version_id = a.version_id AND kind = %s)
+        FROM timetable_active a
+    """, (kind, ref_id, ALL))
+    row = cur.fetchone()
+    if not row or not row[1]:
+        return None
+    return row[0] or "[]"
+
+
+if __name__ == "__main__":
+    # Renders the active version – run once after migrations/003
+    from db import connection
+
+    with connection() as conn, conn.cursor() as cur:
+        count = render_active(cur)
+        conn.commit()
+    print(f"✅ Rendered {count} timetable views" if count else "⚠️ No active timetable version")
@@ -1,17 +1,353 @@
-from db import get_connection
+# timetable_writer.py
+# =====================================================
+# BULK TIMETABLE WRITER
+# Streams generated entries into `timetable` with a single
+# COPY ... FROM STDIN instead of one INSERT per row.
+# Each save is a new version; readers follow the
+# timetable_active pointer (migrations/001). Only rows
+# that differ from the active version cross the wire.
+# Each new version's views are rendered in the same
+# transaction (timetable_render.py).
+# =====================================================
 
-def save_timetable(allocations):
-    conn = get_connection()
-    cur = conn.cursor()
+import io
+import os
+from collections import defaultdict
 
-    cur.execute("DELETE FROM timetable")
+from db import connection
+from slot_maps import SLOTS
 
-    for a in allocations:
-        cur.execute("""
-            INSERT INTO timetable (class_id, subject_id, teacher_id, slot_id)
-            VALUES (%s,%s,%s,%s)
-        """, (a["class_id"], a["subject_id"], a["teacher_id"], a["slot_id"]))
+TIMETABLE_COLUMNS = (
+    "class_id",
+    "subject_id",
+    "teacher_id",
+    "batch_id",
+    "is_lab",
+    "day",
+    "start_time",
+    "end_time",
+    "day_idx",
+    "slot_idx",
+)
 
-    conn.commit()
-    cur.close()
-    conn.close()
+# Identity of a timetable cell when diffing versions
+DIFF_KEY = ("class_id", "batch_id", "day", "start_time")
+_KEY_INDEX = tuple(TIMETABLE_COLUMNS.index(c) for c in DIFF_KEY)
+
+# Versions kept for rollback (the active one is never pruned)
+KEEP_VERSIONS = int(os.getenv("TIMETABLE_KEEP_VERSIONS", "10"))
+
+# Subquery readers filter on
+ACTIVE_VERSION_SQL = "(SELECT version_id FROM timetable_active)"
+
+# day → day_idx column (migrations/002); long names kept for old rows
+DAY_INDEX = {
+    "Mon": 1, "Monday": 1,
+    "Tue": 2, "Tuesday": 2,
+    "Wed": 3, "Wednesday": 3,
+    "Thu": 4, "Thursday": 4,
+    "Fri": 5, "Friday": 5,
+}
+
+# slot → ("08:30", "09:30")
+SLOT_TIME_MAP = {
+    slot: tuple(span.split("-"))
+    for slot, span in SLOTS.items()
+}
+
+
+# -------------------------------
+# ROW BUILDING
+# -------------------------------
+def get_slot(e):
+    return e.get("slot_id") or e.get("slot")
+
+
+def slot_times(e):
+    """(start_time, end_time) of the entry's own slot"""
+    slot = get_slot(e)
+    if slot is None:
+        raise KeyError("❌ Timetable entry missing slot/slot_id")
+    return SLOT_TIME_MAP[slot]
+
+
+def timetable_rows(timetable, times=slot_times):
+    """Entries → tuples in TIMETABLE_COLUMNS order"""
+    rows = []
+    for e in timetable:
+        start_time, end_time = times(e)
+        rows.append((
+            e["class_id"],
+            e["subject_id"],
+            e["teacher_id"],
+            e.get("batch_id"),
+            e["is_lab"],
+            e["day"],
+            start_time,
+            end_time,
+            DAY_INDEX.get(e["day"]),
+            get_slot(e)
+        ))
+    return rows
+
+
+# -------------------------------
+# COPY
+# -------------------------------
+def _copy_value(v):
+    """One field in COPY text format"""
+    if v is None:
+        return "\\N"
+    if isinstance(v, bool):
+        return "t" if v else "f"
+    return (
+        str(v)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_rows(cur, rows, table="timetable", columns=TIMETABLE_COLUMNS):
+    """Sends all rows to the server in one COPY statement"""
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join(_copy_value(v) for v in row))
+        buf.write("\n")
+    buf.seek(0)
+
+    cur.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN",
+        buf
+    )
+    return len(rows)
+
+
+# -------------------------------
+# VERSIONS
+# -------------------------------
+def create_version(cur, entries, note=None, input_hash=None):
+    cur.execute("""
+        INSERT INTO timetable_versions (entries, note, input_hash)
+        VALUES (%s, %s, %s)
+        RETURNING version_id
+    """, (entries, note, input_hash))
+    return cur.fetchone()[0]
+
+
+def cached_version(cur, input_hash):
+    """(version_id, entries) of the newest version generated from input_hash, or None"""
+    cur.execute("""
+        SELECT version_id, entries
+        FROM timetable_versions
+        WHERE input_hash = %s
+        ORDER BY version_id DESC
+        LIMIT 1
+    """, (input_hash,))
+    return cur.fetchone()
+
+
+def activate_version(cur, version_id):
+    """Single-row pointer swap – readers switch atomically on commit"""
+    cur.execute("""
+        INSERT INTO timetable_active (singleton, version_id)
+        VALUES (true, %s)
+        ON CONFLICT (singleton) DO UPDATE
+        SET version_id = EXCLUDED.version_id
+    """, (version_id,))
+
+
+def active_version(cur):
+    cur.execute("SELECT version_id FROM timetable_active")
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def list_versions(cur):
+    cur.execute("""
+        SELECT v.version_id, v.created_at, v.entries, v.note,
+               v.version_id = a.version_id AS active
+        FROM timetable_versions v
+        LEFT JOIN timetable_active a ON true
+        ORDER BY v.version_id DESC
+    """)
+    return [
+        {
+            "version_id": r[0],
+            "created_at": r[1].isoformat() if r[1] else None,
+            "entries": r[2],
+            "note": r[3],
+            "active": bool(r[4]),
+        }
+        for r in cur.fetchall()
+    ]
+
+
+def prune_versions(cur, keep=KEEP_VERSIONS):
+    """Drops all but the newest `keep` versions (rows cascade)"""
+    cur.execute(f"""
+        DELETE FROM timetable_versions
+        WHERE version_id NOT IN (
+            SELECT version_id FROM timetable_versions
+            ORDER BY version_id DESC
+            LIMIT %s
+        )
+        AND version_id <> {ACTIVE_VERSION_SQL}
+    """, (keep,))
+    return cur.rowcount
+
+
+# -------------------------------
+# DIFF
+# -------------------------------
+def _norm(v):
+    """DB time values → the "HH:MM" strings the writer produces"""
+    if hasattr(v, "strftime"):
+        return v.strftime("%H:%M")
+    return v
+
+
+def row_key(row):
+    return tuple(row[i] for i in _KEY_INDEX)
+
+
+def stored_rows(cur, version_id):
+    """{key: [(timetable_id, row), ...]} for one stored version"""
+    cur.execute(f"""
+        SELECT timetable_id, {', '.join(TIMETABLE_COLUMNS)}
+        FROM timetable
+        WHERE timetable_version = %s
+    """, (version_id,))
+
+    stored = defaultdict(list)
+    for r in cur.fetchall():
+        row = tuple(_norm(v) for v in r[1:])
+        stored[row_key(row)].append((r[0], row))
+    return stored
+
+
+def diff_rows(stored, rows):
+    """
+    Compares a stored version with new rows on DIFF_KEY.
+    A key may hold several rows (parallel labs), so rows under a
+    key are paired: identical first, then the rest as updates.
+
+    Returns {"insert": [row], "update": [(old_row, row)],
+             "delete": [old_row], "unchanged": [timetable_id]}
+    """
+    new = defaultdict(list)
+    for row in rows:
+        new[row_key(row)].append(row)
+
+    diff = {"insert": [], "update": [], "delete": [], "unchanged": []}
+
+    for key in set(new) | set(stored):
+        old = list(stored.get(key, []))
+        added = []
+
+        for row in new.get(key, []):
+            match = next((i for i, (_, r) in enumerate(old) if r == row), None)
+            if match is None:
+                added.append(row)
+            else:
+                diff["unchanged"].append(old.pop(match)[0])
+
+        for (_, old_row), row in zip(old, added):
+            diff["update"].append((old_row, row))
+        diff["insert"] += added[len(old):]
+        diff["delete"] += [r for _, r in old[len(added):]]
+
+    return diff
+
+
+def churn_report(diff):
+    """Counts + classes / teachers touched by the change"""
+    class_i = TIMETABLE_COLUMNS.index("class_id")
+    teacher_i = TIMETABLE_COLUMNS.index("teacher_id")
+
+    # both sides of an update – the teacher may have changed
+    touched = diff["insert"] + diff["delete"] + [
+        r for pair in diff["update"] for r in pair
+    ]
+
+    return {
+        "inserted": len(diff["insert"]),
+        "updated": len(diff["update"]),
+        "deleted": len(diff["delete"]),
+        "unchanged": len(diff["unchanged"]),
+        "affected_classes": sorted({r[class_i] for r in touched}),
+        "affected_teachers": sorted({r[teacher_i] for r in touched}),
+    }
+
+
+def clone_rows(cur, version_id, stored_ids):
+    """Copies unchanged rows into the new version server-side"""
+    if not stored_ids:
+        return 0
+    cols = ", ".join(TIMETABLE_COLUMNS)
+    cur.execute(f"""
+        INSERT INTO timetable (timetable_version, {cols}, generated_at)
+        SELECT %s, {cols}, generated_at
+        FROM timetable
+        WHERE timetable_id = ANY(%s)
+    """, (version_id, stored_ids))
+    return cur.rowcount
+
+
+# -------------------------------
+# SAVE
+# -------------------------------
+def publish_timetable(cur, timetable, times=slot_times, note=None, input_hash=None):
+    """
+    Writes `timetable` as the new active version inside the caller's
+    transaction. Rows equal to the active version are cloned on the
+    server; only inserted / updated rows are sent. When nothing
+    changed no version is created. The new version's class and
+    teacher views are rendered before the pointer flips.
+    `input_hash` (snapshot.solver_input_hash) is recorded on the
+    resulting version for the generation result cache.
+
+    Returns (version_id, churn).
+    """
+    rows = timetable_rows(timetable, times)
+
+    current = active_version(cur)
+    stored = stored_rows(cur, current) if current is not None else {}
+    diff = diff_rows(stored, rows)
+    churn = churn_report(diff)
+
+    if current is not None and not (
+        diff["insert"] or diff["update"] or diff["delete"]
+    ):
+        if input_hash is not None:
+            cur.execute(
+                "UPDATE timetable_versions SET input_hash = %s WHERE version_id = %s",
+                (input_hash, current)
+            )
+        return current, churn
+
+    version_id = create_version(cur, len(rows), note, input_hash)
+    clone_rows(cur, version_id, diff["unchanged"])
+
+    changed = diff["insert"] + [row for _, row in diff["update"]]
+    copy_rows(
+        cur,
+        [(version_id,) + row for row in changed],
+        columns=("timetable_version",) + TIMETABLE_COLUMNS
+    )
+
+    from timetable_render import render_version
+    render_version(cur, version_id)
+
+    activate_version(cur, version_id)
+    prune_versions(cur)
+    return version_id, churn
+
+
+def save_timetable(timetable, times=slot_times, note=None):
+    """Publishes a new timetable version and commits → (version_id, churn)"""
+    with connection() as conn, conn.cursor() as cur:
+        result = publish_timetable(cur, timetable, times, note)
+        conn.commit()
+    return result
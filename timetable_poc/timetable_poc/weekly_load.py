@@ -0,0 +1,199 @@
+# weekly_load.py
+# =====================================================
+# TEACHER WEEKLY LOAD RECALCULATION
+# teacher_weekly_load is derived from the allocations and
+# subject_load_config:
+#   theory    ← teacher_subject_allocation
+#   practical ← teacher_batch_subject_allocation
+#
+# Both modes compute loads with the same LOADS_SQL (MAX per
+# key, so duplicate subject_load_config rows agree).
+#
+# Writers log the (teacher, subject, class) keys they touch
+# in weekly_load_changes (migrations/008); the incremental
+# mode recomputes only those keys and applies the result as
+# an upsert + delete diff.
+# =====================================================
+
+from psycopg2.extras import execute_values
+
+
+# -------------------------------
+# LOAD RULES
+# -------------------------------
+# (teacher_id, subject_id, class_id, theory, practical) per key;
+# {keys} optionally narrows both sides to the claimed keys
+LOADS_SQL = """
+    SELECT teacher_id, subject_id, class_id,
+           COALESCE(t.theory, 0) AS theory,
+           COALESCE(p.practical, 0) AS practical
+    FROM (
+        SELECT tsa.teacher_id, tsa.subject_id, tsa.class_id,
+               MAX(slc.weekly_theory_load) AS theory
+        FROM teacher_subject_allocation tsa
+        {keys}
+        JOIN subject_load_config slc
+          ON slc.subject_id = tsa.subject_id
+        GROUP BY tsa.teacher_id, tsa.subject_id, tsa.class_id
+    ) t
+    FULL JOIN (
+        SELECT tbsa.teacher_id, tbsa.subject_id, tbsa.class_id,
+               MAX(slc.weekly_practical_load) AS practical
+        FROM teacher_batch_subject_allocation tbsa
+        {keys}
+        JOIN subject_load_config slc
+          ON slc.subject_id = tbsa.subject_id
+        GROUP BY tbsa.teacher_id, tbsa.subject_id, tbsa.class_id
+    ) p USING (teacher_id, subject_id, class_id)
+"""
+
+
+# -------------------------------
+# CHANGE LOG
+# -------------------------------
+def log_changes(cur, keys):
+    """Marks (teacher_id, subject_id, class_id) keys for the next incremental run"""
+    keys = sorted({tuple(k[:3]) for k in keys})
+    if not keys:
+        return 0
+    execute_values(cur, """
+        INSERT INTO weekly_load_changes (teacher_id, subject_id, class_id)
+        VALUES %s
+        ON CONFLICT (teacher_id, subject_id, class_id)
+        DO UPDATE SET changed_at = clock_timestamp()
+    """, keys, page_size=len(keys))
+    return len(keys)
+
+
+def log_subject_changes(cur, subject_id):
+    """A subject's load config changed – every key allocated to it is stale"""
+    cur.execute("""
+        INSERT INTO weekly_load_changes (teacher_id, subject_id, class_id)
+        SELECT teacher_id, subject_id, class_id
+        FROM teacher_subject_allocation
+        WHERE subject_id = %s
+        UNION
+        SELECT teacher_id, subject_id, class_id
+        FROM teacher_batch_subject_allocation
+        WHERE subject_id = %s
+        ON CONFLICT (teacher_id, subject_id, class_id)
+        DO UPDATE SET changed_at = clock_timestamp()
+    """, (subject_id, subject_id))
+    return cur.rowcount
+
+
+# -------------------------------
+# FULL
+# -------------------------------
+def recalculate_full(cur):
+    """Rebuilds the whole table and clears the change log"""
+    # =====================================================
+    # 1. CLEAR THE LOG FIRST – keys logged from here on were
+    #    written after it and survive for the next run
+    # =====================================================
+    cur.execute("DELETE FROM weekly_load_changes")
+
+    # =====================================================
+    # 2. RESET WEEKLY LOAD TABLE
+    # =====================================================
+    cur.execute("TRUNCATE teacher_weekly_load")
+
+    # =====================================================
+    # 3. INSERT THEORY + PRACTICAL LOADS (ONE ROW PER KEY)
+    # =====================================================
+    cur.execute(f"""
+        INSERT INTO teacher_weekly_load (
+            teacher_id,
+            subject_id,
+            class_id,
+            weekly_theory_load,
+            weekly_practical_load
+        )
+        {LOADS_SQL.format(keys="")}
+    """)
+    return {"mode": "full", "rows": cur.rowcount}
+
+
+# -------------------------------
+# INCREMENTAL
+# -------------------------------
+def recalculate_incremental(cur):
+    """
+    Claims the logged keys with their changed_at, then in a second
+    statement (fresh snapshot, so every claimed change is visible)
+    recomputes them, upserts rows whose loads differ, deletes rows
+    whose allocations are gone and consumes only log rows whose
+    changed_at is unchanged. Keys re-logged meanwhile stay queued.
+    """
+    cur.execute("""
+        SELECT teacher_id, subject_id, class_id, changed_at
+        FROM weekly_load_changes
+    """)
+    claimed = cur.fetchall()
+    if not claimed:
+        return {"mode": "incremental", "keys": 0, "requeued": 0, "upserted": 0, "deleted": 0}
+
+    keys = "JOIN claimed k USING (teacher_id, subject_id, class_id)"
+    (upserted, deleted, consumed), = execute_values(cur, f"""
+        WITH claimed (teacher_id, subject_id, class_id, changed_at) AS (
+            VALUES %s
+        ),
+        desired AS (
+            {LOADS_SQL.format(keys=keys)}
+        ),
+        upserted AS (
+            INSERT INTO teacher_weekly_load (
+                teacher_id,
+                subject_id,
+                class_id,
+                weekly_theory_load,
+                weekly_practical_load
+            )
+            SELECT teacher_id, subject_id, class_id, theory, practical
+            FROM desired
+            ON CONFLICT (teacher_id, subject_id, class_id)
+            DO UPDATE
+            SET weekly_theory_load = EXCLUDED.weekly_theory_load,
+                weekly_practical_load = EXCLUDED.weekly_practical_load
+            WHERE (teacher_weekly_load.weekly_theory_load,
+                   teacher_weekly_load.weekly_practical_load)
+                  IS DISTINCT FROM
+                  (EXCLUDED.weekly_theory_load, EXCLUDED.weekly_practical_load)
+            RETURNING 1
+        ),
+        deleted AS (
+            DELETE FROM teacher_weekly_load w
+            USING claimed k
+            WHERE w.teacher_id = k.teacher_id
+              AND w.subject_id = k.subject_id
+              AND w.class_id = k.class_id
+              AND NOT EXISTS (
+                  SELECT 1 FROM desired d
+                  WHERE d.teacher_id = w.teacher_id
+                    AND d.subject_id = w.subject_id
+                    AND d.class_id = w.class_id
+              )
+            RETURNING 1
+        ),
+        consumed AS (
+            DELETE FROM weekly_load_changes c
+            USING claimed k
+            WHERE c.teacher_id = k.teacher_id
+              AND c.subject_id = k.subject_id
+              AND c.class_id = k.class_id
+              AND c.changed_at = k.changed_at
+            RETURNING 1
+        )
+        SELECT
+            (SELECT COUNT(*) FROM upserted),
+            (SELECT COUNT(*) FROM deleted),
+            (SELECT COUNT(*) FROM consumed)
+    """, claimed, page_size=len(claimed), fetch=True)
+
+    return {
+        "mode": "incremental",
+        "keys": len(claimed),
+        "requeued": len(claimed) - consumed,
+        "upserted": upserted,
+        "deleted": deleted,
+    }